@@ -1,80 +1,76 @@
-from modules.tools import convertTime, debug
-from modules.wfi_manager import WFIManager
-from modules.container import Container, LB, AB, Partikel, Sole_Transfer, Keimfilter, VK
-from modules.make_plots import plot, gantt
-from modules.observer import Observer
-from modules.states import HYG_STAT
-from modules.routes import Routes
-
-import simpy
-
-
-SIM_TIME = convertTime((20, 0, 0))
-
-
-def main():
-    env = simpy.Environment()
-    observer = Observer(sT=SIM_TIME)
-    routes = Routes(env=env)
-    
-    env.process(wheel(env, observer, routes))
-    env.run(until=SIM_TIME)
-
-    plot(observer)
-    gantt(observer)
-
-def wheel(env, observer, routes):
-    wfi = WFIManager(env, SIM_TIME, 40, observer)
-    system = {
-        "Lösebehälter": LB(env, SIM_TIME, 'LB', wfi, observer, routes),
-        "Partikelfiltration": Partikel(env, SIM_TIME, 'Partikel', wfi, observer, routes),
-        "Transferstrecke": Sole_Transfer(env, SIM_TIME, 'Transfer', wfi, observer, routes),
-        "Abfüllbehälter_A": AB(env, SIM_TIME, 'AB1', wfi, observer, routes),
-        "Abfüllbehälter_B": AB(env, SIM_TIME, 'AB2', wfi, observer, routes),
-        "Keimfilter_A": Keimfilter(env, SIM_TIME, 'Keim1', wfi, observer, routes),
-        "Keimfilter_B": Keimfilter(env, SIM_TIME, 'Keim2', wfi, observer, routes),
-        "Ventilknoten": VK(env, SIM_TIME, 'VK', wfi, observer, routes),
-    }
-
-    stack = [
-        env.process(system["Lösebehälter"].cip()),
-        env.process(system["Lösebehälter"].sip()),
-        env.process(system["Lösebehälter"].prod_lb()),
-        env.process(system["Abfüllbehälter_A"].cip()),
-        env.process(system["Abfüllbehälter_A"].sip()),
-        env.process(system["Ventilknoten"].cip()),
-        env.process(system["Ventilknoten"].sip()),
-        env.process(system["Transferstrecke"].cip()),
-        env.process(system["Transferstrecke"].sip()),
-        env.process(system["Abfüllbehälter_A"].prod(system['Lösebehälter'])),
-        env.process(system["Keimfilter_A"].cip()),
-        env.process(system["Keimfilter_A"].sip()),
-        env.process(system["Partikelfiltration"].cip()),
-        env.process(system["Partikelfiltration"].sip()),
-
-        # env.process(system["Abfüllbehälter_B"].cip()),
-        # env.process(system["Keimfilter_B"].cip()),
-        # env.process(system["Abfüllbehälter_B"].sip()),
-        # env.process(system["Keimfilter_B"].sip()),
-    ]
-
-    stack_iter = iter(stack)
-
-    while True:
-        current_time = int(env.now)
-
-        try:
-            next(stack_iter)
-        except StopIteration:
-            pass
-
-        for s in system:
-            system[s].cycle()
-
-        wfi.cycle()        
-        observer.cycle(current_time)
-
-        yield env.timeout(convertTime((0, 1)))
+import json
+import argparse
+import numpy as np
+from modules.scenario import SIM_TIME, GOALS, simulate
+from modules.distributions import DISTRIBUTIONS
+from modules import log
+
+LOG_LEVELS = {'debug': log.DEBUG, 'info': log.INFO, 'warning': log.WARNING, 'off': log.OFF}
+
+
+def parse_args(argv: list[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Simulation der CIP/SIP Abläufe einer Ansatzanlage')
+    parser.add_argument('--hours', type=float, default=SIM_TIME / 3600, help='Simulationsdauer in Stunden')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--wfi-capacity', type=int, default=40)
+    parser.add_argument('--distribution', choices=DISTRIBUTIONS, default='truncnorm')
+    parser.add_argument('--topology', default=None, help='Anlagenbeschreibung als JSON, Standard config/plant.json')
+    parser.add_argument('--replications', type=int, default=0, help='Monte Carlo Läufe statt eines Einzellaufs')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--output', default=None, help='Plots als Dateien in dieses Verzeichnis schreiben (headless)')
+    parser.add_argument('--formats', nargs='+', default=['png', 'html'], choices=['png', 'svg', 'pdf', 'html'])
+    parser.add_argument('--no-plot', action='store_true', help='Nur simulieren, nichts zeichnen')
+    parser.add_argument('--trace', default=None, help='Verzeichnis für den Trace Export (Parquet)')
+    parser.add_argument('--profile', default=None, help='Laufzeitbericht als JSON in diese Datei schreiben')
+    parser.add_argument('--log-level', choices=LOG_LEVELS, default='debug')
+    parser.add_argument('--until', nargs='+', choices=GOALS, default=None, help='Lauf beenden, sobald eines der Kriterien erfüllt ist, spätestens nach --hours')
+    return parser.parse_args(argv)
+
+def main(argv: list[str] = None):
+    args = parse_args(argv)
+    sT = int(args.hours * 3600)
+    log.configure(level=LOG_LEVELS[args.log_level])
+    if args.seed is None:
+        # Ohne --seed einen frischen Seed ziehen: er ist die Lauf-Id im Trace (kein Überschreiben von 0.parquet)
+        # und wird ausgegeben, damit sich der Lauf wiederholen lässt
+        args.seed = int(np.random.SeedSequence().generate_state(1)[0])
+
+    if args.replications:
+        from modules.montecarlo import run_replications
+        summary = run_replications(args.replications, seed=args.seed, workers=args.workers, sT=sT, wfi_capacity=args.wfi_capacity,
+                                   distribution=args.distribution, topology=args.topology, trace_dir=args.trace, profile=args.profile is not None, goal=args.until)
+        summary.pop('runs')
+        summary['seed'] = args.seed
+        if args.profile is not None:
+            with open(args.profile, 'w', encoding='utf-8') as f:
+                json.dump(summary.pop('profile'), f, indent=2, ensure_ascii=False)
+        print(json.dumps(summary, indent=2))
+        return
+
+    trace = None
+    if args.trace is not None:
+        from modules.trace import TraceWriter
+        trace = TraceWriter(args.trace, run=args.seed)
+    profiler = None
+    if args.profile is not None:
+        from modules.profiling import Profiler
+        profiler = Profiler()
+    run = simulate(sT=sT, wfi_capacity=args.wfi_capacity, seed=args.seed, distribution=args.distribution, topology=args.topology, trace=trace, profiler=profiler, goal=args.until)
+    if profiler is not None:
+        profiler.write(args.profile)
+    print(json.dumps(dict(seed=args.seed, makespan=run.makespan, end=run.end, tasks=len(run.observer.tasks))))
+
+    if args.no_plot:
+        return
+
+    # Plotbibliotheken erst hier laden, reine Simulationsläufe brauchen sie nicht
+    from modules.make_plots import plot, gantt
+    if args.output is None:
+        plot(run.observer)
+        gantt(run.observer)
+    else:
+        for file in plot(run.observer, args.output, tuple(args.formats)) + gantt(run.observer, args.output, tuple(args.formats)):
+            print(file)
 
 if __name__ == '__main__':
     main()
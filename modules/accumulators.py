@@ -0,0 +1,185 @@
+import math
+import numpy as np
+
+QUANTILES = (0.5, 0.9, 0.95, 0.99)
+
+
+class SummaryError(Exception):
+    pass
+
+
+class QuantileSketch:
+    # Gewichtete Quantile mit relativer Genauigkeit alpha (logarithmische Buckets wie DDSketch).
+    # Solange es höchstens max_exact verschiedene Werte gibt (Zustände, WFI Stufen), wird exakt gezählt.
+    def __init__(self, alpha: float = 0.01, max_exact: int = 256) -> None:
+        self.gamma = (1 + alpha) / (1 - alpha)
+        self.log_gamma = math.log(self.gamma)
+        self.max_exact = max_exact
+        self.exact: dict[float, float] | None = {}
+        self.positive: dict[int, float] = {}
+        self.negative: dict[int, float] = {}
+        self.zero = 0.0
+        self.weight = 0.0
+
+    def _key(self, value: float) -> int:
+        return math.ceil(math.log(abs(value)) / self.log_gamma)
+
+    def _value(self, key: int) -> float:
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    def add(self, value: float, weight: float):
+        if weight <= 0:
+            return
+        self.weight += weight
+        if self.exact is not None:
+            self.exact[value] = self.exact.get(value, 0.0) + weight
+            if len(self.exact) > self.max_exact:
+                self.exact = None
+        if value > 0:
+            key = self._key(value)
+            self.positive[key] = self.positive.get(key, 0.0) + weight
+        elif value < 0:
+            key = self._key(value)
+            self.negative[key] = self.negative.get(key, 0.0) + weight
+        else:
+            self.zero += weight
+
+    def merge(self, other: 'QuantileSketch'):
+        if self.exact is not None and other.exact is not None:
+            for value, weight in other.exact.items():
+                self.exact[value] = self.exact.get(value, 0.0) + weight
+            if len(self.exact) > self.max_exact:
+                self.exact = None
+        else:
+            self.exact = None
+        for own, theirs in ((self.positive, other.positive), (self.negative, other.negative)):
+            for key, weight in theirs.items():
+                own[key] = own.get(key, 0.0) + weight
+        self.zero += other.zero
+        self.weight += other.weight
+
+    def _sorted(self) -> tuple[np.ndarray, np.ndarray]:
+        if self.exact is not None:
+            values = np.array(sorted(self.exact))
+            return values, np.array([self.exact[v] for v in values])
+        negative = sorted(self.negative, reverse=True)
+        positive = sorted(self.positive)
+        values = [-self._value(k) for k in negative] + [0.0] + [self._value(k) for k in positive]
+        weights = [self.negative[k] for k in negative] + [self.zero] + [self.positive[k] for k in positive]
+        return np.array(values), np.array(weights)
+
+    def quantiles(self, qs=QUANTILES) -> list[float]:
+        if self.weight == 0:
+            return [0.0] * len(qs)
+        values, weights = self._sorted()
+        cumulative = np.cumsum(weights) / self.weight
+        idx = np.minimum(np.searchsorted(cumulative, qs, side='left'), len(values) - 1)
+        return values[idx].tolist()
+
+
+def time_above(v0: float, v1: float, dt: float, threshold: float) -> float:
+    # Anteil eines linearen Abschnitts von v0 nach v1 (Dauer dt) oberhalb der Schwelle
+    if v0 > threshold and v1 > threshold:
+        return dt
+    if v0 <= threshold and v1 <= threshold:
+        return 0.0
+    crossing = dt * (threshold - v0) / (v1 - v0)
+    return dt - crossing if v1 > threshold else crossing
+
+
+class TimeWeighted:
+    # Gleiche Schnittstelle wie die Puffer in storage.py, speichert aber keinen Verlauf:
+    # jeder Änderungspunkt schreibt nur Fläche, Extremwerte, Zeit über Schwellen und das Quantil-Sketch fort
+    def __init__(self, thresholds: tuple = (), alpha: float = 0.01, max_exact: int = 256, segments: int = 4) -> None:
+        self.thresholds = tuple(thresholds)
+        self.segments = segments
+        self.sketch = QuantileSketch(alpha, max_exact)
+        self.count = 0
+        self.start = None
+        self.time = self.value = self.rate = None
+        self.area = 0.0
+        self.max = -math.inf
+        self.min = math.inf
+        self.above = [0.0] * len(self.thresholds)
+        self.summary = None
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _advance(self, time: float):
+        dt = time - self.time
+        if dt <= 0:
+            return
+        v0 = self.value
+        v1 = v0 + self.rate * dt
+        self.area += (v0 + v1) / 2 * dt
+        self.max = max(self.max, v0, v1)
+        self.min = min(self.min, v0, v1)
+        for i, threshold in enumerate(self.thresholds):
+            self.above[i] += time_above(v0, v1, dt, threshold)
+        if self.rate == 0:
+            self.sketch.add(v0, dt)
+        else:
+            # Lineare Abschnitte über die Mittelpunkte einiger Teilstücke in das Sketch übernehmen
+            step = dt / self.segments
+            for k in range(self.segments):
+                self.sketch.add(v0 + self.rate * step * (k + 0.5), step)
+
+    def append(self, time: float, value: float, rate: float):
+        if self.time is None:
+            self.start = time
+        else:
+            self._advance(time)
+        self.time, self.value, self.rate = time, value, rate
+        self.count += 1
+
+    def last(self) -> tuple | None:
+        if self.time is None:
+            return None
+        return self.time, self.value, self.rate
+
+    def replace_last(self, time: float, value: float, rate: float):
+        # Gleicher Zeitpunkt, der ersetzte Wert hatte keine Dauer
+        self.time, self.value, self.rate = time, value, rate
+
+    def arrays(self, t0: float = None, t1: float = None) -> tuple:
+        raise SummaryError('Zusammenfassung ohne Verlauf, Werte nur über SummaryStore.summaries')
+
+    def finish(self, sT: float) -> dict:
+        if self.summary is not None:
+            return self.summary
+        if self.time is not None:
+            self._advance(sT)
+        span = sT - self.start if self.start is not None else 0
+        exact = self.sketch.exact
+        self.summary = dict(
+            changes=self.count,
+            mean=self.area / span if span else 0.0,
+            min=self.min if span else None,
+            max=self.max if span else None,
+            time_above={str(threshold): above for threshold, above in zip(self.thresholds, self.above)},
+            quantiles={f'p{round(q * 100)}': v for q, v in zip(QUANTILES, self.sketch.quantiles())},
+            distribution={str(v): w for v, w in sorted(exact.items())} if exact is not None else None,
+        )
+        return self.summary
+
+    def close(self) -> dict:
+        return {}
+
+
+class SummaryStore:
+    # Statt MemoryStore/ChunkedStore an den Observer übergeben, wenn nur Kennzahlen je Lauf gebraucht werden.
+    # thresholds = {'WFI-Manager/available_capacity': (0, 10)}
+    def __init__(self, thresholds: dict[str, tuple] = None, alpha: float = 0.01, max_exact: int = 256) -> None:
+        self.thresholds = thresholds or {}
+        self.alpha = alpha
+        self.max_exact = max_exact
+        self.buffers: dict[str, TimeWeighted] = {}
+        self.summaries: dict[str, dict] = {}
+
+    def buffer(self, key: str) -> TimeWeighted:
+        self.buffers[key] = TimeWeighted(self.thresholds.get(key, ()), self.alpha, self.max_exact)
+        return self.buffers[key]
+
+    def close(self, **meta):
+        self.summaries = {key: buffer.finish(meta['sT']) for key, buffer in self.buffers.items()}
@@ -0,0 +1,150 @@
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import statistics
+import subprocess
+import tracemalloc
+from modules.scenario import SIM_TIME, simulate
+from modules.topology import generate_lines, repeat_campaigns
+from modules.profiling import Profiler
+from modules.montecarlo import run_replications
+from modules import log
+
+DAY = 86400
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.benchmarks')
+
+
+def git_commit() -> tuple[str, bool]:
+    root = os.path.dirname(RESULTS_DIR)
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=root, capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=root, capture_output=True, text=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown', False
+    return commit, dirty
+
+def count_events(**kwargs) -> int:
+    # Abgearbeitete Events über den Profiler, in einem eigenen Lauf, damit dessen Mehraufwand nicht mitgemessen wird
+    profiler = Profiler()
+    simulate(profiler=profiler, **kwargs)
+    return profiler.report()['steps']
+
+def time_run(repeat: int = 3, **kwargs) -> dict:
+    # Bester und mittlerer Wert aus repeat Läufen
+    walls = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run = simulate(**kwargs)
+        walls.append(time.perf_counter() - start)
+    events = count_events(**kwargs)
+    sT = kwargs.get('sT', SIM_TIME)
+    best = min(walls)
+    return dict(
+        wall=best,
+        wall_median=statistics.median(walls),
+        events=events,
+        events_per_second=events / best,
+        wall_per_day=best / (sT / DAY),
+        makespan=run.makespan,
+    )
+
+def memory_peak(**kwargs) -> float:
+    # tracemalloc verlangsamt den Lauf, deshalb getrennt von der Zeitmessung; Ergebnis in MiB
+    tracemalloc.start()
+    try:
+        simulate(**kwargs)
+        return tracemalloc.get_traced_memory()[1] / 2**20
+    finally:
+        tracemalloc.stop()
+
+
+def cases(quick: bool = False) -> dict:
+    lines = (1, 2, 4) if quick else (1, 2, 4, 8, 16)
+    days = (1, 7) if quick else (1, 7, 30)
+    replications = (8,) if quick else (16, 64)
+    return dict(
+        reference=lambda: time_run(repeat=5, seed=1),
+        # Je Tag eine weitere Kampagne, sonst käme nach der ersten Kampagne nur noch Leerlauf hinzu
+        **{f'horizon_{d}d': (lambda d=d: time_run(seed=1, sT=d * DAY, topology=repeat_campaigns(d))) for d in days},
+        # Je Linie 40 WFI, damit Linien nicht nur am WFI Engpass warten
+        **{f'lines_{n}': (lambda n=n: time_run(seed=1, sT=3 * DAY, topology=generate_lines(n), wfi_capacity=40 * n)) for n in lines},
+        **{f'montecarlo_{n}': (lambda n=n: replications_run(n)) for n in replications},
+        memory_horizon=lambda: dict(peak_mib=memory_peak(seed=1, sT=max(days) * DAY, topology=repeat_campaigns(max(days)))),
+        memory_lines=lambda: dict(peak_mib=memory_peak(seed=1, sT=3 * DAY, topology=generate_lines(max(lines)), wfi_capacity=40 * max(lines))),
+    )
+
+def replications_run(n: int) -> dict:
+    start = time.perf_counter()
+    summary = run_replications(n, seed=0)
+    wall = time.perf_counter() - start
+    return dict(wall=wall, replications_per_second=n / wall, finished=summary['finished'])
+
+def run_benchmarks(quick: bool = False, only: list[str] = None) -> dict:
+    commit, dirty = git_commit()
+    results = {}
+    with log.configured(level=log.OFF):
+        for name, case in cases(quick).items():
+            if only and name not in only:
+                continue
+            results[name] = case()
+            print(f'{name: <20}{json.dumps(results[name])}', file=sys.stderr)
+    return dict(
+        commit=commit,
+        dirty=dirty,
+        timestamp=time.strftime('%Y-%m-%dT%H:%M:%S'),
+        python=platform.python_version(),
+        machine=platform.machine(),
+        cpus=os.cpu_count(),
+        quick=quick,
+        cases=results,
+    )
+
+def save(report: dict, directory: str = RESULTS_DIR) -> str:
+    os.makedirs(directory, exist_ok=True)
+    suffix = '-dirty' if report['dirty'] else ''
+    stem = os.path.join(directory, f"{report['timestamp'].replace(':', '')}_{report['commit']}{suffix}")
+    file, n = f'{stem}.json', 1
+    while os.path.exists(file):
+        file, n = f'{stem}-{n}.json', n + 1
+    with open(file, 'w') as f:
+        json.dump(report, f, indent=2)
+    return file
+
+def compare(old: dict, new: dict, threshold: float = 0.1) -> list[dict]:
+    # Verhältnis neu/alt der Laufzeit bzw. des Speichers je Fall, > 1 + threshold gilt als Regression
+    rows = []
+    for name, result in new['cases'].items():
+        if name not in old['cases']:
+            continue
+        key = 'wall' if 'wall' in result else 'peak_mib'
+        ratio = result[key] / old['cases'][name][key] if old['cases'][name][key] else float('inf')
+        rows.append(dict(case=name, metric=key, old=old['cases'][name][key], new=result[key], ratio=ratio, regression=ratio > 1 + threshold))
+    return rows
+
+
+def main(argv: list[str] = None):
+    parser = argparse.ArgumentParser(description='Durchsatz- und Skalierungsbenchmarks der Simulation')
+    parser.add_argument('--quick', action='store_true', help='Kleinere Fälle, z.B. für schnelle Vergleiche vor einem Commit')
+    parser.add_argument('--only', nargs='+', default=None, help='Nur diese Fälle ausführen')
+    parser.add_argument('--compare', default=None, help='Mit einem gespeicherten Ergebnis vergleichen')
+    parser.add_argument('--threshold', type=float, default=0.1)
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(args.quick, args.only)
+    print(save(report))
+
+    if args.compare is not None:
+        with open(args.compare) as f:
+            old = json.load(f)
+        rows = compare(old, report, args.threshold)
+        for row in rows:
+            flag = '  REGRESSION' if row['regression'] else ''
+            print(f"{row['case']: <20}{row['metric']: <10}{row['old']:>12.4f}{row['new']:>12.4f}{row['ratio']:>8.2f}{flag}")
+        if any(row['regression'] for row in rows):
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
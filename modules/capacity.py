@@ -0,0 +1,164 @@
+import os
+import sys
+import math
+import json
+import argparse
+from functools import partial
+from statistics import NormalDist
+from concurrent.futures import ProcessPoolExecutor
+from modules.scenario import SIM_TIME
+from modules.montecarlo import replication_seeds, predraw, replicate, summarize
+from modules.wfi_manager import WFIError
+
+
+def wfi_capacity(value: float) -> dict:
+    return dict(wfi_capacity=int(value))
+
+def fill_rate(outlet: str, unit: str = '*'):
+    # Füllrate eines Auslasses (m³/h) für eine oder alle Einheiten
+    def parameter(value: float) -> dict:
+        return dict(units={unit: {'fill_rates': {outlet: value}}})
+    return parameter
+
+PARAMETERS = {'wfi_capacity': wfi_capacity, 'fill_rate': fill_rate}
+
+
+def replicate_makespan(seed: int, predrawn: dict, **kwargs) -> float | None:
+    # Eine Anforderung über der Gesamtkapazität kann nie bedient werden: der Punkt ist nicht machbar
+    try:
+        return replicate(seed, predrawn, **kwargs)['makespan']
+    except WFIError:
+        return None
+
+def wilson(successes: int, n: int, z: float) -> tuple[float, float]:
+    # Konfidenzintervall für einen Anteil, auch bei 0 oder n Erfolgen brauchbar
+    if n == 0:
+        return 0.0, 1.0
+    p = successes / n
+    centre = (p + z * z / (2 * n)) / (1 + z * z / n)
+    half = z / (1 + z * z / n) * (p * (1 - p) / n + z * z / (4 * n * n)) ** 0.5
+    return max(0.0, centre - half), min(1.0, centre + half)
+
+
+class CapacitySolver:
+    # Kleinster Wert eines Parameters, bei dem der Plan mit Wahrscheinlichkeit >= confidence bis target fertig wird.
+    # Annahme: mehr Kapazität bzw. höhere Raten machen den Plan nicht langsamer (monoton), daher Bisektion.
+    # Jeder Punkt wird in Stapeln von batch Replikationen bewertet, bis das Wilson Intervall die Schwelle
+    # confidence nicht mehr enthält oder max_replications erreicht sind. Alle Punkte nutzen dieselben Seeds (CRN).
+    def __init__(self, target: float, confidence: float = 0.9, parameter=wfi_capacity, error: float = 0.05, batch: int = 8,
+                 max_replications: int = 64, seed: int = 0, workers: int = None, sT: int = SIM_TIME, distribution: str = 'truncnorm',
+                 topology: str | dict = None, **fixed) -> None:
+        self.target = target
+        self.confidence = confidence
+        self.parameter = parameter
+        self.z = NormalDist().inv_cdf(1 - error / 2)
+        self.batch = batch
+        self.max_replications = max_replications
+        self.seed = seed
+        self.workers = workers or os.cpu_count()
+        self.sT = sT
+        self.distribution = distribution
+        self.topology = topology
+        self.fixed = fixed
+        self.seeds = replication_seeds(max_replications, seed)
+        self.points: dict[float, dict] = {}
+
+    def _kwargs(self, value: float) -> dict:
+        # Läufe enden mit dem Stack oder, als Fehlschlag, kurz nach der Ziel-Makespan
+        kwargs = dict(sT=self.sT, distribution=self.distribution, topology=self.topology, goal=('stack', self.target + 1), **self.fixed)
+        for key, override in self.parameter(value).items():
+            kwargs[key] = {**kwargs[key], **override} if isinstance(override, dict) and key in kwargs else override
+        return kwargs
+
+    def evaluate(self, value: float, pool: ProcessPoolExecutor) -> dict:
+        if value in self.points:
+            return self.points[value]
+        kwargs = self._kwargs(value)
+        table = predraw(self.max_replications, self.seed, self.distribution, 1, self.sT, kwargs.get('units'), self.topology)
+        makespans = []
+        while len(makespans) < self.max_replications:
+            indices = range(len(makespans), min(len(makespans) + self.batch, self.max_replications))
+            rows = [{key: values[i] for key, values in table.items()} for i in indices]
+            makespans += pool.map(partial(replicate_makespan, **kwargs), [self.seeds[i] for i in indices], rows)
+            successes = sum(m is not None and m <= self.target for m in makespans)
+            lower, upper = wilson(successes, len(makespans), self.z)
+            # Früh abbrechen, sobald die Entscheidung statistisch klar ist
+            if lower >= self.confidence or upper < self.confidence:
+                break
+
+        p = successes / len(makespans)
+        decided = lower >= self.confidence or upper < self.confidence
+        self.points[value] = dict(
+            value=value,
+            replications=len(makespans),
+            successes=successes,
+            probability=p,
+            lower=lower,
+            upper=upper,
+            decided=decided,
+            # Unentschieden nach max_replications: Punktschätzer entscheidet
+            feasible=lower >= self.confidence if decided else p >= self.confidence,
+            makespan=summarize([m for m in makespans if m is not None]),
+        )
+        return self.points[value]
+
+    def solve(self, low: float, high: float, resolution: float = 1) -> dict:
+        # resolution >= 1: ganzzahlige Suche, Grenzen nach außen auf ganze Zahlen runden
+        integer = resolution >= 1
+        if integer:
+            low, high, resolution = math.floor(low), math.ceil(high), max(1, int(resolution))
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            if not self.evaluate(high, pool)['feasible']:
+                best = None
+            elif self.evaluate(low, pool)['feasible']:
+                best = low
+            else:
+                # Invariante: low reicht nicht, high reicht
+                while high - low > resolution:
+                    middle = (low + high) // 2 if integer else (low + high) / 2
+                    assert low < middle < high, (low, middle, high)
+                    if self.evaluate(middle, pool)['feasible']:
+                        high = middle
+                    else:
+                        low = middle
+                best = high
+        points = sorted(self.points.values(), key=lambda point: point['value'])
+        return dict(
+            value=best,
+            target=self.target,
+            confidence=self.confidence,
+            replications=sum(point['replications'] for point in points),
+            points=points,
+        )
+
+
+def main(argv: list[str] = None):
+    parser = argparse.ArgumentParser(description='Kleinste WFI Kapazität bzw. Füllrate für eine Ziel-Makespan mit vorgegebener Sicherheit')
+    parser.add_argument('--target-hours', type=float, required=True, help='Plan muss bis hierhin fertig sein')
+    parser.add_argument('--confidence', type=float, default=0.9, help='Geforderter Anteil der Läufe innerhalb der Ziel-Makespan')
+    parser.add_argument('--parameter', choices=PARAMETERS, default='wfi_capacity')
+    parser.add_argument('--outlet', default='UV042', help='Auslass für --parameter fill_rate')
+    parser.add_argument('--low', type=float, required=True)
+    parser.add_argument('--high', type=float, required=True)
+    parser.add_argument('--resolution', type=float, default=1)
+    parser.add_argument('--error', type=float, default=0.05, help='Irrtumswahrscheinlichkeit der Entscheidung je Punkt')
+    parser.add_argument('--batch', type=int, default=8)
+    parser.add_argument('--max-replications', type=int, default=64)
+    parser.add_argument('--hours', type=float, default=SIM_TIME / 3600)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--wfi-capacity', type=int, default=40, help='Feste WFI Kapazität für --parameter fill_rate')
+    parser.add_argument('--topology', default=None)
+    args = parser.parse_args(argv)
+
+    parameter = fill_rate(args.outlet) if args.parameter == 'fill_rate' else wfi_capacity
+    fixed = dict(wfi_capacity=args.wfi_capacity) if args.parameter == 'fill_rate' else {}
+    solver = CapacitySolver(args.target_hours * 3600, args.confidence, parameter, args.error, args.batch, args.max_replications,
+                            args.seed, args.workers, int(args.hours * 3600), topology=args.topology, **fixed)
+    result = solver.solve(args.low, args.high, args.resolution)
+    print(json.dumps(result, indent=2))
+    if result['value'] is None:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
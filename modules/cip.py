@@ -1,8 +1,12 @@
-from modules.tools import debug, convertTime, aufteilen, generate_random_time
+from modules.tools import convertTime
 from modules.states import HYG_STAT, change_state
+from modules.log import get_logger
 
 DEBUG = False
 
+CIP = get_logger('CIP')
+SIP = get_logger('SIP')
+
 class CIPError(Exception):
     pass
 
@@ -14,7 +18,7 @@ class MissingKeyError(CIPError):
 
 def cip_vessel(self, LB: bool, wfi_rates, fill_rates, durations):
     start_time = self.env.now
-    total_duration = generate_random_time(durations)
+    total_duration = self.draw_duration('cip', durations)
 
     if DEBUG:
         total_duration = durations['lower']
@@ -63,8 +67,8 @@ def cip_vessel(self, LB: bool, wfi_rates, fill_rates, durations):
     # with self.resource.request() as req:
     #     yield req
 
-    yield self.env.process(change_state(self, HYG_STAT.cleaning, 'cip'))
-    debug(self.env, f'CIP', f'{self.name} - Reinigung gestartet')
+    yield from change_state(self, HYG_STAT.cleaning, 'cip')
+    CIP.info(self.env, '%s - Reinigung gestartet', self.name)
 
     cycle = 0
     run = True
@@ -79,40 +83,40 @@ def cip_vessel(self, LB: bool, wfi_rates, fill_rates, durations):
 
         if LB and cycle in (1, 3):
             # Container Zugabe
-            yield self.env.process(self.request_and_release_wfi(self.wfi_rates['UV043'], zeiten['time_cip_container_zugabe']))
+            yield self.env.process(self.request_and_release_wfi(self.wfi_rates['UV043'], zeiten['time_cip_container_zugabe'], 'Container Zugabe'))
             yield self.env.timeout(zeiten['time_reset_container_zugabe'])
 
             # Handzugabe
-            yield self.env.process(self.request_and_release_wfi(self.wfi_rates['UV043'], zeiten['time_cip_handzugabe']))
+            yield self.env.process(self.request_and_release_wfi(self.wfi_rates['UV043'], zeiten['time_cip_handzugabe'], 'Handzugabe'))
             yield self.env.timeout(zeiten['time_reset_handzugabe'])
 
             # Rohstoffzugabe
-            yield self.env.process(self.request_and_release_wfi(self.wfi_rates['UV043'], zeiten['time_cip_rohstoffzugabe']))
+            yield self.env.process(self.request_and_release_wfi(self.wfi_rates['UV043'], zeiten['time_cip_rohstoffzugabe'], 'Rohstoffzugabe'))
             yield self.env.timeout(zeiten['time_reset_rohstoffzugabe'])
 
             # Einlauf
-            yield self.env.process(self.request_and_release_wfi(self.wfi_rates['UV043'], zeiten['time_cip_einlauf']))
+            yield self.env.process(self.request_and_release_wfi(self.wfi_rates['UV043'], zeiten['time_cip_einlauf'], 'Einlauf'))
             yield self.env.timeout(zeiten['time_reset_einlauf'])
 
             # Sprühkugeln
-            yield self.env.process(self.request_and_release_wfi(self.wfi_rates['UV043'], zeiten['time_cip_sprühkugeln']))
+            yield self.env.process(self.request_and_release_wfi(self.wfi_rates['UV043'], zeiten['time_cip_sprühkugeln'], 'Sprühkugeln'))
             yield self.env.timeout(zeiten['time_reset_sprühkugeln'])
 
         if not LB and cycle in (1, 3):
             # Trans In
-            yield self.env.process(self.request_and_release_wfi(self.wfi_rates['UV363'], zeiten['time_cip_trans_in']))
+            yield self.env.process(self.request_and_release_wfi(self.wfi_rates['UV363'], zeiten['time_cip_trans_in'], 'Trans In'))
             yield self.env.timeout(zeiten['time_reset_trans_in'])
 
             # Einlauf
-            yield self.env.process(self.request_and_release_wfi(self.wfi_rates['UV043'], zeiten['time_cip_einlauf']))
+            yield self.env.process(self.request_and_release_wfi(self.wfi_rates['UV043'], zeiten['time_cip_einlauf'], 'Einlauf'))
             yield self.env.timeout(zeiten['time_reset_einlauf'])
 
             # Fallrohr / Glas
-            yield self.env.process(self.request_and_release_wfi(self.wfi_rates['UV043'], zeiten['time_cip_fallrohr']))
+            yield self.env.process(self.request_and_release_wfi(self.wfi_rates['UV043'], zeiten['time_cip_fallrohr'], 'Fallrohr / Glas'))
             yield self.env.timeout(zeiten['time_reset_fallrohr'])
 
             # Sprühkugeln
-            yield self.env.process(self.request_and_release_wfi(self.wfi_rates['UV043'], zeiten['time_cip_sprühkugeln']))
+            yield self.env.process(self.request_and_release_wfi(self.wfi_rates['UV043'], zeiten['time_cip_sprühkugeln'], 'Sprühkugeln'))
             yield self.env.timeout(zeiten['time_reset_sprühkugeln'])
         
         if cycle == 2:
@@ -143,14 +147,14 @@ def cip_vessel(self, LB: bool, wfi_rates, fill_rates, durations):
         
         cycle += 1
 
-    debug(self.env, f'CIP', f'{self.name} - Reinigung beendet, Soll: {total_duration}, Ist: {self.env.now - start_time}')
-    yield self.env.process(change_state(self, HYG_STAT.cleaned, 'cip'))
+    CIP.info(self.env, '%s - Reinigung beendet, Soll: %s, Ist: %s', self.name, total_duration, self.env.now - start_time)
+    yield from change_state(self, HYG_STAT.cleaned, 'cip')
     self.last_clean_time = int(self.env.now)
 
 
 def cip_transf(self, wfi_rates, durations):
     start_time = self.env.now
-    total_duration = generate_random_time(durations)
+    total_duration = self.draw_duration('cip', durations)
 
     if DEBUG:
         total_duration = durations['lower']
@@ -175,8 +179,8 @@ def cip_transf(self, wfi_rates, durations):
     # with self.resource.request() as req:
     #     yield req
 
-    yield self.env.process(change_state(self, HYG_STAT.cleaning, 'cip'))
-    debug(self.env, f'CIP', f'{self.name} - Reinigung gestartet')
+    yield from change_state(self, HYG_STAT.cleaning, 'cip')
+    CIP.info(self.env, '%s - Reinigung gestartet', self.name)
 
     cycle = 0
     run = True
@@ -188,15 +192,15 @@ def cip_transf(self, wfi_rates, durations):
         if cycle in (1, 2, 3):
             # CIP Start
             yield self.env.timeout(zeiten['time_route_sleep'])
-            yield self.env.process(self.request_and_release_wfi(self.wfi_rates['UV373'], zeiten['time_start']))
+            yield self.env.process(self.request_and_release_wfi(self.wfi_rates['UV373'], zeiten['time_start'], 'CIP Start'))
 
             # Start Trans A
             yield self.env.timeout(zeiten['time_route_sleep'])
-            yield self.env.process(self.request_and_release_wfi(self.wfi_rates['UV373'], zeiten['time_transfer']))
+            yield self.env.process(self.request_and_release_wfi(self.wfi_rates['UV373'], zeiten['time_transfer'], 'Start Trans A'))
 
             # Start Trans B
             yield self.env.timeout(zeiten['time_route_sleep'])
-            yield self.env.process(self.request_and_release_wfi(self.wfi_rates['UV373'], zeiten['time_transfer']))
+            yield self.env.process(self.request_and_release_wfi(self.wfi_rates['UV373'], zeiten['time_transfer'], 'Start Trans B'))
 
             # Ausblasen
             yield self.env.timeout(zeiten['time_route_sleep'])
@@ -220,13 +224,13 @@ def cip_transf(self, wfi_rates, durations):
         
         cycle += 1
 
-    debug(self.env, f'CIP', f'{self.name} - Reinigung beendet, Soll: {total_duration}, Ist: {self.env.now - start_time}')
-    yield self.env.process(change_state(self, HYG_STAT.cleaned, 'cip'))
+    CIP.info(self.env, '%s - Reinigung beendet, Soll: %s, Ist: %s', self.name, total_duration, self.env.now - start_time)
+    yield from change_state(self, HYG_STAT.cleaned, 'cip')
     self.last_clean_time = int(self.env.now)
 
 def cip_filter(self, wfi_rates, durations):
     start_time = self.env.now
-    total_duration = generate_random_time(durations)
+    total_duration = self.draw_duration('cip', durations)
 
     if DEBUG:
         total_duration = durations['lower']
@@ -252,8 +256,8 @@ def cip_filter(self, wfi_rates, durations):
     # with self.resource.request() as req:
     #     yield req
 
-    yield self.env.process(change_state(self, HYG_STAT.cleaning, 'cip'))
-    debug(self.env, f'CIP', f'{self.name} - Reinigung gestartet')
+    yield from change_state(self, HYG_STAT.cleaning, 'cip')
+    CIP.info(self.env, '%s - Reinigung gestartet', self.name)
 
     cycle = 0
     run = True
@@ -265,19 +269,19 @@ def cip_filter(self, wfi_rates, durations):
         if cycle in (1, 2, 3):
             # CIP Start
             yield self.env.timeout(zeiten['time_route_sleep'])
-            yield self.env.process(self.request_and_release_wfi(self.wfi_rates['UV373'], zeiten['time_start']))
+            yield self.env.process(self.request_and_release_wfi(self.wfi_rates['UV373'], zeiten['time_start'], 'CIP Start'))
 
             # Start Filter 1
             yield self.env.timeout(zeiten['time_route_sleep'])
-            yield self.env.process(self.request_and_release_wfi(self.wfi_rates['UV373'], zeiten['time_filter']))
+            yield self.env.process(self.request_and_release_wfi(self.wfi_rates['UV373'], zeiten['time_filter'], 'Start Filter 1'))
 
             # Start Filter 2
             yield self.env.timeout(zeiten['time_route_sleep'])
-            yield self.env.process(self.request_and_release_wfi(self.wfi_rates['UV373'], zeiten['time_filter']))
+            yield self.env.process(self.request_and_release_wfi(self.wfi_rates['UV373'], zeiten['time_filter'], 'Start Filter 2'))
 
             # Start Transfer
             yield self.env.timeout(zeiten['time_route_sleep'])
-            yield self.env.process(self.request_and_release_wfi(self.wfi_rates['UV373'], zeiten['time_transfer']))
+            yield self.env.process(self.request_and_release_wfi(self.wfi_rates['UV373'], zeiten['time_transfer'], 'Start Transfer'))
 
             # Ausblasen
             yield self.env.timeout(zeiten['time_route_sleep'])
@@ -305,13 +309,13 @@ def cip_filter(self, wfi_rates, durations):
         
         cycle += 1
 
-    debug(self.env, f'CIP', f'{self.name} - Reinigung beendet, Soll: {total_duration}, Ist: {self.env.now - start_time}')
-    yield self.env.process(change_state(self, HYG_STAT.cleaned, 'cip'))
+    CIP.info(self.env, '%s - Reinigung beendet, Soll: %s, Ist: %s', self.name, total_duration, self.env.now - start_time)
+    yield from change_state(self, HYG_STAT.cleaned, 'cip')
     self.last_clean_time = int(self.env.now)
 
 def cip_knoten(self, wfi_rates, durations):
     start_time = self.env.now
-    total_duration = generate_random_time(durations)
+    total_duration = self.draw_duration('cip', durations)
 
     if DEBUG:
         total_duration = durations['lower']
@@ -338,8 +342,8 @@ def cip_knoten(self, wfi_rates, durations):
     # with self.resource.request() as req:
     #     yield req
 
-    yield self.env.process(change_state(self, HYG_STAT.cleaning, 'cip'))
-    debug(self.env, f'CIP', f'{self.name} - Reinigung gestartet')
+    yield from change_state(self, HYG_STAT.cleaning, 'cip')
+    CIP.info(self.env, '%s - Reinigung gestartet', self.name)
 
     cycle = 0
     run = True
@@ -351,7 +355,7 @@ def cip_knoten(self, wfi_rates, durations):
         if cycle in (1, 2):
             # CIP AFKNT
             yield self.env.timeout(zeiten['time_route_sleep'])
-            yield self.env.process(self.request_and_release_wfi(self.wfi_rates['UV373'], zeiten['time_cip_afknt']))
+            yield self.env.process(self.request_and_release_wfi(self.wfi_rates['UV373'], zeiten['time_cip_afknt'], 'CIP AFKNT'))
 
             # Ausblasen AFKNT
             yield self.env.timeout(zeiten['time_route_sleep'])
@@ -359,7 +363,7 @@ def cip_knoten(self, wfi_rates, durations):
 
             # CIP A
             yield self.env.timeout(zeiten['time_route_sleep'])
-            yield self.env.process(self.request_and_release_wfi(self.wfi_rates['UV373'], zeiten['time_cip_a']))
+            yield self.env.process(self.request_and_release_wfi(self.wfi_rates['UV373'], zeiten['time_cip_a'], 'CIP A'))
 
             # Ausblasen A
             yield self.env.timeout(zeiten['time_route_sleep'])
@@ -367,7 +371,7 @@ def cip_knoten(self, wfi_rates, durations):
 
             # CIP B
             yield self.env.timeout(zeiten['time_route_sleep'])
-            yield self.env.process(self.request_and_release_wfi(self.wfi_rates['UV373'], zeiten['time_cip_b']))
+            yield self.env.process(self.request_and_release_wfi(self.wfi_rates['UV373'], zeiten['time_cip_b'], 'CIP B'))
 
             # Ausblasen B
             yield self.env.timeout(zeiten['time_route_sleep'])
@@ -389,23 +393,23 @@ def cip_knoten(self, wfi_rates, durations):
         
         cycle += 1
 
-    debug(self.env, f'CIP', f'{self.name} - Reinigung beendet, Soll: {total_duration}, Ist: {self.env.now - start_time}')
-    yield self.env.process(change_state(self, HYG_STAT.cleaned, 'cip'))
+    CIP.info(self.env, '%s - Reinigung beendet, Soll: %s, Ist: %s', self.name, total_duration, self.env.now - start_time)
+    yield from change_state(self, HYG_STAT.cleaned, 'cip')
     self.last_clean_time = int(self.env.now)
 
 def sip_default(self, durations):
-    total_duration = generate_random_time(durations)
+    total_duration = self.draw_duration('sip', durations)
 
     while not self.state == HYG_STAT.cleaned:
-        yield self.env.timeout(convertTime((0, 1)))
+        yield self.wait_for(HYG_STAT.cleaned)
 
-    yield self.env.process(change_state(self, HYG_STAT.sanitizing, 'sip'))
-    debug(self.env, f'SIP', f'{self.name} - Sanitisierung gestartet')
+    yield from change_state(self, HYG_STAT.sanitizing, 'sip')
+    SIP.info(self.env, '%s - Sanitisierung gestartet', self.name)
 
     yield self.env.timeout(total_duration)
 
-    debug(self.env, f'SIP', f'{self.name} - Sanitisierung beendet')
-    yield self.env.process(change_state(self, HYG_STAT.sanitized, 'sip'))
+    SIP.info(self.env, '%s - Sanitisierung beendet', self.name)
+    yield from change_state(self, HYG_STAT.sanitized, 'sip')
     self.last_sip_time = int(self.env.now)
 
 
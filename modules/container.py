@@ -1,79 +1,167 @@
 import simpy.resources
-from modules.states import HYG_STAT, change_state
-from modules.tools import debug, convertTime, aufteilen, generate_random_time
+from modules.states import HYG_STAT, SIP_STATES, StateMachine, change_state
+from modules.tools import convertTime
 from modules.wfi_manager import WFIManager
 from modules.observer import Observer
-from modules.routes import Routes
+from modules.routes import Routes, Reservation
+from modules.scheduler import Scheduler
+from modules.flow import FlowLevel, transfer
+from modules.streams import RandomStreams
+from modules.distributions import DurationSampler
 from modules.cip import cip_vessel, cip_transf, cip_filter, cip_knoten, sip_default
+from modules.log import get_logger
 
 import simpy
 import numpy as np
 from typing import Self
 
+LOG = get_logger('Container')
+PROD = get_logger('PROD')
+
+
 class Container:
-    def __init__(self, env: simpy.Environment, sT: int, name: str, wfi_manager: WFIManager, observer: Observer, routes: Routes) -> None:
+    def __init__(self, env: simpy.Environment, sT: int, name: str, wfi_manager: WFIManager, observer: Observer, routes: Routes, scheduler: Scheduler, streams: RandomStreams = None) -> None:
         self.name = name
         self.env = env
         self.sT = sT
-        self.state = HYG_STAT.dirty
-        self.sip_state = HYG_STAT.dirty
-        self.resource = simpy.Resource(env, capacity=1)
+        self.cip_machine = StateMachine(env, scheduler, name, 'cip', trace=observer.trace)
+        self.sip_machine = StateMachine(env, scheduler, name, 'sip', trace=observer.trace)
         self.observer = observer
         self.routes = routes
         self.wfi_manager = wfi_manager
+        self.scheduler = scheduler
+        self.priorities: dict[str, int] = {}
+        # WFI Anforderungen dieser Einheit: kleinere Priorität zuerst, reserve=True reserviert ohne zu warten (CEW)
+        self.wfi_priority = 0
+        self.wfi_reserve = False
         self.cht = convertTime((72, 0, 0))
-        self.last_clean_time = 0
-        self.last_sip_time = 0
+        self._last_clean_time = 0
+        self._last_sip_time = 0
+        self._cht_clean_timer = None
+        self._cht_sip_timer = None
+        # Wird bei der ersten überschrittenen Standzeit ausgelöst (Abbruchkriterium 'cht')
+        self.cht_violated = env.event()
+
+        # Eigener Zufallsstrom je Container und Phase (Common Random Numbers)
+        streams = streams if streams is not None else RandomStreams()
+        self.samplers = {
+            'cip': DurationSampler(streams.stream(name, 'cip'), streams.distribution),
+            'sip': DurationSampler(streams.stream(name, 'sip'), streams.distribution),
+        }
 
         observer.add_variable(f'cip state', self, 'state.value')
         observer.add_variable(f'sip state', self, 'sip_state.value')
 
-    def cycle(self):
-        current_time = int(self.env.now)
-        if current_time < self.sT:
-            # CHT Monitoring
-            if self.state in [HYG_STAT.cleaned] and current_time - self.last_clean_time >= self.cht:
-                self.state = HYG_STAT.dirty
-                debug(self.env, 'Container', f'{self.name} - Reinigungssstandzeit überschritten')
+    @property
+    def state(self) -> HYG_STAT:
+        return self.cip_machine.state
+
+    @state.setter
+    def state(self, value: HYG_STAT):
+        self.cip_machine.set(value)
+
+    @property
+    def sip_state(self) -> HYG_STAT:
+        return self.sip_machine.state
+
+    @sip_state.setter
+    def sip_state(self, value: HYG_STAT):
+        self.sip_machine.set(value)
+
+    def wait_for(self, state: HYG_STAT, type: str = None) -> simpy.Event:
+        if type is None:
+            type = 'sip' if state in SIP_STATES else 'cip'
+        if type == 'sip':
+            return self.sip_machine.wait_for(state)
+        return self.cip_machine.wait_for(state)
+
+    @property
+    def last_clean_time(self) -> int:
+        return self._last_clean_time
+
+    @last_clean_time.setter
+    def last_clean_time(self, value: int):
+        self._last_clean_time = value
+        if self._cht_clean_timer is not None:
+            self._cht_clean_timer.cancel()
+        self._cht_clean_timer = self.scheduler.call_at(value + self.cht, self.cht_clean_expired)
+
+    @property
+    def last_sip_time(self) -> int:
+        return self._last_sip_time
+
+    @last_sip_time.setter
+    def last_sip_time(self, value: int):
+        self._last_sip_time = value
+        if self._cht_sip_timer is not None:
+            self._cht_sip_timer.cancel()
+        self._cht_sip_timer = self.scheduler.call_at(value + self.cht, self.cht_sip_expired)
+
+    def cht_clean_expired(self):
+        # CHT Monitoring
+        if self.state in [HYG_STAT.cleaned]:
+            self.state = HYG_STAT.dirty
+            LOG.warning(self.env, '%s - Reinigungssstandzeit überschritten', self.name)
+            self._violated('cip')
+
+    def cht_sip_expired(self):
+        if self.sip_state in [HYG_STAT.sanitized]:
+            self.sip_state = HYG_STAT.dirty
+            LOG.warning(self.env, '%s - Sterilstandzeit überschritten', self.name)
+            self._violated('sip')
+
+    def _violated(self, machine: str):
+        if not self.cht_violated.triggered:
+            self.cht_violated.succeed((self.name, machine))
+
+    def reserve(self, operation: str, *units: 'Container') -> Reservation:
+        # Routenabschnitte laut Topologie und beteiligte Einheiten in einem Schritt
+        return self.routes.reserve(self.name, operation, *(unit.name for unit in units), priority=self.priorities.get(operation, 0))
 
-            if self.sip_state in [HYG_STAT.sanitized] and current_time - self.last_sip_time >= self.cht:
-                self.sip_state = HYG_STAT.dirty
-                debug(self.env, 'Container', f'{self.name} - Sterilstandzeit überschritten')
+    def sip(self):
+        with self.reserve('sip', self) as reservation:
+            yield reservation
+
+            start = self.env.now
+            yield self.env.process(sip_default(self=self, durations=self.sip_durations))
+            self.observer.add_task(task="SIP", resource=self.name, start=start, end=self.env.now)
+
+    def draw_duration(self, phase: str, durations: dict) -> int:
+        return self.samplers[phase].draw(durations)
 
     def flow_time(self, fill_rate, amount):
         amount = amount / 1000
         return int((amount / fill_rate) * convertTime((1, 0, 0)))
 
-    def request_and_release_wfi(self, require_wfi: int, duration: int):
-        while not self.wfi_manager.request_wfi(require_wfi):
-            yield self.env.timeout(convertTime((0, 1)))
+    def request_and_release_wfi(self, require_wfi: int, duration: int, phase: str = None):
+        # Phasenname für den Profiler, ohne Profiler nur eine Zuweisung
+        self.env.active_process.phase = phase
+        yield self.wfi_manager.request_wfi(require_wfi, self.wfi_priority, self.wfi_reserve)
 
         yield self.env.timeout(duration)
         self.wfi_manager.release_wfi(require_wfi)
 
 class Vessel(Container):
-    def __init__(self, env: simpy.Environment, sT: int, name: str, wfi_manager: WFIManager, observer: Observer, routes: Routes, capacity: int) -> None:
-        super().__init__(env, sT, name, wfi_manager, observer, routes)
+    def __init__(self, env: simpy.Environment, sT: int, name: str, wfi_manager: WFIManager, observer: Observer, routes: Routes, scheduler: Scheduler, capacity: int, streams: RandomStreams = None) -> None:
+        super().__init__(env, sT, name, wfi_manager, observer, routes, scheduler, streams)
 
-        self.volume = simpy.Container(env, init=0, capacity=capacity)
-        observer.add_variable(f'volume', self, 'volume.level')
+        self.volume = FlowLevel(env, scheduler, init=0, capacity=capacity)
+        observer.add_variable(f'volume', self, 'volume.level', rate_name='volume.rate')
 
-    def fill(self, wfi_rate: int, fill_rate: int, amount: int):
+    def fill(self, wfi_rate: int, fill_rate: int, amount: int, phase: str = None):
+        self.env.active_process.phase = phase
         fill_time = int((amount / fill_rate) * convertTime((1, 0, 0)))
 
-        while not self.wfi_manager.request_wfi(wfi_rate):
-            yield self.env.timeout(convertTime((0, 1)))
+        yield self.wfi_manager.request_wfi(wfi_rate, self.wfi_priority, self.wfi_reserve)
 
-        for _ in range(fill_time):
-            self.volume.put(amount / fill_time)
-            yield self.env.timeout(convertTime((0, 1)))
+        yield from self.volume.flow(amount, fill_time)
 
         self.wfi_manager.release_wfi(wfi_rate)
 
 
 class LB(Vessel):
-    def __init__(self, env: simpy.Environment, sT: int, name: str, wfi_manager: WFIManager, observer: Observer, routes: Routes) -> None:
-        super().__init__(env, sT, name, wfi_manager, observer, routes, capacity=6)
+    def __init__(self, env: simpy.Environment, sT: int, name: str, wfi_manager: WFIManager, observer: Observer, routes: Routes, scheduler: Scheduler, streams: RandomStreams = None) -> None:
+        super().__init__(env, sT, name, wfi_manager, observer, routes, scheduler, capacity=6, streams=streams)
 
         self.wfi_rates = {
             'UV043': 18,    # 90°C für CIP über Medieneinlauf
@@ -100,55 +188,37 @@ class LB(Vessel):
         }
 
     def cip(self):
-        r1 = self.routes.rLB_P
-
-        with r1.request() as req:
-            yield req
-
-            with self.resource.request() as req1:
-                yield req1
+        with self.reserve('cip', self) as reservation:
+            yield reservation
 
-                start = self.env.now
-                yield self.env.process(cip_vessel(self=self, LB=True, wfi_rates=self.wfi_rates, fill_rates=self.fill_rates, durations=self.cip_durations))
-                self.observer.add_task(task="CIP", resource=self.name, start=convertTime(start), end=convertTime(self.env.now))
-
-    def sip(self):
-        r1 = self.routes.rLB_P
-
-        with r1.request() as req:
-            yield req
-
-            with self.resource.request() as req1:
-                yield req1
-
-                start = self.env.now
-                yield self.env.process(sip_default(self=self, durations=self.sip_durations))
-                self.observer.add_task(task="SIP", resource=self.name, start=convertTime(start), end=convertTime(self.env.now))
+            start = self.env.now
+            yield self.env.process(cip_vessel(self=self, LB=True, wfi_rates=self.wfi_rates, fill_rates=self.fill_rates, durations=self.cip_durations))
+            self.observer.add_task(task="CIP", resource=self.name, start=start, end=self.env.now)
 
     def prod_lb(self):
         LB_amount = 2
 
         while not self.state == HYG_STAT.cleaned:
-            yield self.env.timeout(convertTime((0, 1)))
+            yield self.wait_for(HYG_STAT.cleaned)
 
         while not self.sip_state == HYG_STAT.sanitized:
-            yield self.env.timeout(convertTime((0, 1)))
+            yield self.wait_for(HYG_STAT.sanitized)
 
-        with self.resource.request() as req:
-            yield req
+        with self.reserve('prod_lb', self) as reservation:
+            yield reservation
 
             start = self.env.now
-            yield self.env.process(change_state(self, HYG_STAT.production, 'cip'))
-            yield self.env.process(change_state(self, HYG_STAT.production, 'sip'))
-            debug(self.env, f'PROD', f'{self.name} - Produktion gestartet')
+            yield from change_state(self, HYG_STAT.production, 'cip')
+            yield from change_state(self, HYG_STAT.production, 'sip')
+            PROD.info(self.env, '%s - Produktion gestartet', self.name)
 
-            yield self.env.process(self.fill(wfi_rate=self.wfi_rates['UV042'], fill_rate=self.fill_rates['UV042'], amount=LB_amount))
-            self.observer.add_task(task="Produktion", resource=self.name, start=convertTime(start), end=convertTime(self.env.now))
+            yield self.env.process(self.fill(wfi_rate=self.wfi_rates['UV042'], fill_rate=self.fill_rates['UV042'], amount=LB_amount, phase='Vorlage'))
+            self.observer.add_task(task="Produktion", resource=self.name, start=start, end=self.env.now)
 
 
 class AB(Vessel):
-    def __init__(self, env: simpy.Environment, sT: int, name: str, wfi_manager: WFIManager, observer: Observer, routes: Routes) -> None:
-        super().__init__(env, sT, name, wfi_manager, observer, routes, capacity=100)
+    def __init__(self, env: simpy.Environment, sT: int, name: str, wfi_manager: WFIManager, observer: Observer, routes: Routes, scheduler: Scheduler, streams: RandomStreams = None) -> None:
+        super().__init__(env, sT, name, wfi_manager, observer, routes, scheduler, capacity=100, streams=streams)
 
         self.wfi_rates = {
             'UV043': 30,    # 90°C für CIP über Medieneinlauf
@@ -177,46 +247,12 @@ class AB(Vessel):
         }
 
     def cip(self):
-        if self.name == '2020_A':
-            r1 = self.routes.rT_AB1
-            r2 = self.routes.rAB1_K1
-        else:
-            r1 = self.routes.rT_AB2
-            r2 = self.routes.rAB2_K2
-
-        with r1.request() as req:
-            yield req
-
-            with r2.request() as req1:
-                yield req1
-
-                with self.resource.request() as req2:
-                    yield req2
+        with self.reserve('cip', self) as reservation:
+            yield reservation
 
-                    start = self.env.now
-                    yield self.env.process(cip_vessel(self=self, LB=True, wfi_rates=self.wfi_rates, fill_rates=self.fill_rates, durations=self.cip_durations))
-                    self.observer.add_task(task="CIP", resource=self.name, start=convertTime(start), end=convertTime(self.env.now))
-
-    def sip(self):
-        if self.name == '2020_A':
-            r1 = self.routes.rT_AB1
-            r2 = self.routes.rAB1_K1
-        else:
-            r1 = self.routes.rT_AB2
-            r2 = self.routes.rAB2_K2
-
-        with r1.request() as req:
-            yield req
-
-            with r2.request() as req1:
-                yield req1
-
-                with self.resource.request() as req2:
-                    yield req2
-
-                    start = self.env.now
-                    yield self.env.process(sip_default(self=self, durations=self.sip_durations))
-                    self.observer.add_task(task="SIP", resource=self.name, start=convertTime(start), end=convertTime(self.env.now))
+            start = self.env.now
+            yield self.env.process(cip_vessel(self=self, LB=True, wfi_rates=self.wfi_rates, fill_rates=self.fill_rates, durations=self.cip_durations))
+            self.observer.add_task(task="CIP", resource=self.name, start=start, end=self.env.now)
 
     def prod(self, donator: Self):
         time_between_cycles = 5
@@ -230,72 +266,53 @@ class AB(Vessel):
         AB_enddose_fill_rate = self.fill_rates['UV042']
         AB_enddose_target = 30
 
-        r1 = self.routes.rLB_P
-        r2 = self.routes.rP_T
-        if self.name == '2020_A':
-            r3 = self.routes.rT_AB1
-        else:
-            r3 = self.routes.rT_AB2
-
-        with r1.request() as req:
-            yield req
-
-            with r2.request() as req1:
-                yield req1
+        # Erst auf die Zustände warten, dann reservieren: wer den Lösebehälter belegt, während dieser
+        # noch auf seine eigene Reservierung für die Produktion wartet, blockiert beide
+        while not self.state == HYG_STAT.cleaned or not donator.state == HYG_STAT.production:
+            yield self.wait_for(HYG_STAT.cleaned) & donator.wait_for(HYG_STAT.production, 'cip')
 
-                with r3.request() as req2:
-                    yield req2
+        while not self.sip_state == HYG_STAT.sanitized or not donator.sip_state == HYG_STAT.production:
+            yield self.wait_for(HYG_STAT.sanitized) & donator.wait_for(HYG_STAT.production, 'sip')
 
-                    with donator.resource.request() as don_req:
-                        yield don_req
+        with self.reserve('prod', donator, self) as reservation:
+            yield reservation
 
-                        with self.resource.request() as own_req:
-                            yield own_req
-
-                            start = self.env.now
-
-                            while not self.state == HYG_STAT.cleaned or not donator.state == HYG_STAT.production:
-                                yield self.env.timeout(convertTime((0, 1)))
-
-                            while not self.sip_state == HYG_STAT.sanitized or not donator.sip_state == HYG_STAT.production:
-                                yield self.env.timeout(convertTime((0, 1)))
+            start = self.env.now
 
-                            yield self.env.process(change_state(self, HYG_STAT.production, 'cip'))
-                            yield self.env.process(change_state(self, HYG_STAT.production, 'sip'))
-                            debug(self.env, f'PROD', f'{donator.name} -> {self.name} - Produktion gestartet')
+            yield from change_state(self, HYG_STAT.production, 'cip')
+            yield from change_state(self, HYG_STAT.production, 'sip')
+            PROD.info(self.env, '%s -> %s - Produktion gestartet', donator.name, self.name)
 
-                            yield self.env.process(self.fill(wfi_rate=AB_predose_wfi_rate, fill_rate=AB_predose_fill_rate, amount=AB_predose_amount))       # Abfüllbehälter vordosieren
-                            yield self.env.process(self.transfer(donator))                                                                                  # Sole Transfer
-                            yield self.env.timeout(time_between_cycles)
+            yield self.env.process(self.fill(wfi_rate=AB_predose_wfi_rate, fill_rate=AB_predose_fill_rate, amount=AB_predose_amount, phase='Vordosieren'))       # Abfüllbehälter vordosieren
+            yield self.env.process(self.transfer(donator, phase='Sole Transfer'))                                                                  # Sole Transfer
+            yield self.env.timeout(time_between_cycles)
 
-                            for _ in range(3):
-                                yield self.env.process(donator.fill(wfi_rate=LB_flush_wfi_rate, fill_rate=LB_flush_fill_rate, amount=LB_flush_amount))      # Spülzyklus 
-                                yield self.env.process(self.transfer(donator))                                                                              # Transfer zyklus
-                                yield self.env.timeout(time_between_cycles)
+            for _ in range(3):
+                yield self.env.process(donator.fill(wfi_rate=LB_flush_wfi_rate, fill_rate=LB_flush_fill_rate, amount=LB_flush_amount, phase='Spülzyklus'))      # Spülzyklus 
+                yield self.env.process(self.transfer(donator, phase='Transferzyklus'))                                                              # Transfer zyklus
+                yield self.env.timeout(time_between_cycles)
 
-                            debug(self.env, f'PROD', f'{donator.name} - Produktion beendet')
-                            yield self.env.process(change_state(donator, HYG_STAT.dirty, 'cip'))
+            PROD.info(self.env, '%s - Produktion beendet', donator.name)
+            yield from change_state(donator, HYG_STAT.dirty, 'cip')
 
-                            rest_volume = AB_enddose_target - self.volume.level
-                            yield self.env.process(self.fill(wfi_rate=AB_enddose_wfi_rate, fill_rate=AB_enddose_fill_rate, amount=rest_volume))             # Abfüllbehälter enddosieren
-                            debug(self.env, f'PROD', f'{self.name} - Produkt steht bereit')
-                            self.observer.add_task(task="Produktion", resource=self.name, start=convertTime(start), end=convertTime(self.env.now))
+            rest_volume = AB_enddose_target - self.volume.level
+            yield self.env.process(self.fill(wfi_rate=AB_enddose_wfi_rate, fill_rate=AB_enddose_fill_rate, amount=rest_volume, phase='Enddosieren'))             # Abfüllbehälter enddosieren
+            PROD.info(self.env, '%s - Produkt steht bereit', self.name)
+            self.observer.add_task(task="Produktion", resource=self.name, start=start, end=self.env.now)
 
-    def transfer(self, donator: Self):
+    def transfer(self, donator: Self, phase: str = None):
+        self.env.active_process.phase = phase
         transfer_rate = 10
 
         transfer_volume = donator.volume.level
         transfer_time = int((transfer_volume / transfer_rate) * convertTime((1, 0, 0)))
 
-        for _ in range(transfer_time):
-            step_volume = transfer_volume / transfer_time
-            yield donator.volume.get(step_volume)
-            yield self.volume.put(step_volume)
-            yield self.env.timeout(convertTime((0, 1)))
+        yield from transfer(donator.volume, self.volume, transfer_volume, transfer_time)
+
 
 class Sole_Transfer(Container):
-    def __init__(self, env: simpy.Environment, sT: int, name: str, wfi_manager: WFIManager, observer: Observer, routes: Routes) -> None:
-        super().__init__(env, sT, name, wfi_manager, observer, routes)
+    def __init__(self, env: simpy.Environment, sT: int, name: str, wfi_manager: WFIManager, observer: Observer, routes: Routes, scheduler: Scheduler, streams: RandomStreams = None) -> None:
+        super().__init__(env, sT, name, wfi_manager, observer, routes, scheduler, streams)
 
         self.wfi_rates = {
             'UV373': 10,    # 90°C für CIP
@@ -314,50 +331,17 @@ class Sole_Transfer(Container):
         }
 
     def cip(self):
-        r1 = self.routes.rP_T
-        r2 = self.routes.rT_AB1
-        r3 = self.routes.rT_AB2
-
-        with r1.request() as req:
-            yield req
-
-            with r2.request() as req1:
-                yield req1
-
-                with r3.request() as req2:
-                    yield req2
-
-                    with self.resource.request() as req3:
-                        yield req3
+        with self.reserve('cip', self) as reservation:
+            yield reservation
 
-                        start = self.env.now
-                        yield self.env.process(cip_transf(self=self, wfi_rates=self.wfi_rates, durations=self.cip_durations))
-                        self.observer.add_task(task="CIP", resource=self.name, start=convertTime(start), end=convertTime(self.env.now))
-
-    def sip(self):
-        r1 = self.routes.rP_T
-        r2 = self.routes.rT_AB1
-        r3 = self.routes.rT_AB2
-
-        with r1.request() as req:
-            yield req
-
-            with r2.request() as req1:
-                yield req1
-
-                with r3.request() as req2:
-                    yield req2
-
-                    with self.resource.request() as req3:
-                        yield req3
+            start = self.env.now
+            yield self.env.process(cip_transf(self=self, wfi_rates=self.wfi_rates, durations=self.cip_durations))
+            self.observer.add_task(task="CIP", resource=self.name, start=start, end=self.env.now)
 
-                        start = self.env.now
-                        yield self.env.process(sip_default(self=self, durations=self.sip_durations))
-                        self.observer.add_task(task="SIP", resource=self.name, start=convertTime(start), end=convertTime(self.env.now))
 
 class Partikel(Container):
-    def __init__(self, env: simpy.Environment, sT: int, name: str, wfi_manager: WFIManager, observer: Observer, routes: Routes) -> None:
-        super().__init__(env, sT, name, wfi_manager, observer, routes)
+    def __init__(self, env: simpy.Environment, sT: int, name: str, wfi_manager: WFIManager, observer: Observer, routes: Routes, scheduler: Scheduler, streams: RandomStreams = None) -> None:
+        super().__init__(env, sT, name, wfi_manager, observer, routes, scheduler, streams)
 
         self.wfi_rates = {
             'UV373': 10,    # 90°C für CIP
@@ -376,43 +360,17 @@ class Partikel(Container):
         }
 
     def cip(self):
-        r1 = self.routes.rLB_P
-        r2 = self.routes.rP_T
-
-        with r1.request() as req:
-            yield req
-
-            with r2.request() as req1:
-                yield req1
+        with self.reserve('cip', self) as reservation:
+            yield reservation
 
-                with self.resource.request() as req2:
-                    yield req2
-
-                    start = self.env.now
-                    yield self.env.process(cip_filter(self=self, wfi_rates=self.wfi_rates, durations=self.cip_durations))
-                    self.observer.add_task(task="CIP", resource=self.name, start=convertTime(start), end=convertTime(self.env.now))
-
-    def sip(self):
-        r1 = self.routes.rLB_P
-        r2 = self.routes.rP_T
-
-        with r1.request() as req:
-            yield req
-
-            with r2.request() as req1:
-                yield req1
-
-                with self.resource.request() as req2:
-                    yield req2
-
-                    start = self.env.now
-                    yield self.env.process(sip_default(self=self, durations=self.sip_durations))
-                    self.observer.add_task(task="SIP", resource=self.name, start=convertTime(start), end=convertTime(self.env.now))
+            start = self.env.now
+            yield self.env.process(cip_filter(self=self, wfi_rates=self.wfi_rates, durations=self.cip_durations))
+            self.observer.add_task(task="CIP", resource=self.name, start=start, end=self.env.now)
 
 
 class Keimfilter(Container):
-    def __init__(self, env: simpy.Environment, sT: int, name: str, wfi_manager: WFIManager, observer: Observer, routes: Routes) -> None:
-        super().__init__(env, sT, name, wfi_manager, observer, routes)
+    def __init__(self, env: simpy.Environment, sT: int, name: str, wfi_manager: WFIManager, observer: Observer, routes: Routes, scheduler: Scheduler, streams: RandomStreams = None) -> None:
+        super().__init__(env, sT, name, wfi_manager, observer, routes, scheduler, streams)
 
         self.wfi_rates = {
             'UV373': 10,    # 90°C für CIP
@@ -432,51 +390,17 @@ class Keimfilter(Container):
         }
 
     def cip(self):
-        if self.name == '2021_A':
-            r1 = self.routes.rAB1_K1
-            r2 = self.routes.rK1_VK
-        else:
-            r1 = self.routes.rAB2_K2
-            r2 = self.routes.rK2_VK
-
-        with r1.request() as req:
-            yield req
+        with self.reserve('cip', self) as reservation:
+            yield reservation
 
-            with r2.request() as req1:
-                yield req1
-
-                with self.resource.request() as req2:
-                    yield req2
-
-                    start = self.env.now
-                    yield self.env.process(cip_filter(self=self, wfi_rates=self.wfi_rates, durations=self.cip_durations))
-                    self.observer.add_task(task="CIP", resource=self.name, start=convertTime(start), end=convertTime(self.env.now))
-
-    def sip(self):
-        if self.name == '2021_A':
-            r1 = self.routes.rAB1_K1
-            r2 = self.routes.rK1_VK
-        else:
-            r1 = self.routes.rAB2_K2
-            r2 = self.routes.rK2_VK
-
-        with r1.request() as req:
-            yield req
-
-            with r2.request() as req1:
-                yield req1
-
-                with self.resource.request() as req2:
-                    yield req2
-
-                    start = self.env.now
-                    yield self.env.process(sip_default(self=self, durations=self.sip_durations))
-                    self.observer.add_task(task="SIP", resource=self.name, start=convertTime(start), end=convertTime(self.env.now))
+            start = self.env.now
+            yield self.env.process(cip_filter(self=self, wfi_rates=self.wfi_rates, durations=self.cip_durations))
+            self.observer.add_task(task="CIP", resource=self.name, start=start, end=self.env.now)
 
 
 class VK(Container):
-    def __init__(self, env: simpy.Environment, sT: int, name: str, wfi_manager: WFIManager, observer: Observer, routes: Routes) -> None:
-        super().__init__(env, sT, name, wfi_manager, observer, routes)
+    def __init__(self, env: simpy.Environment, sT: int, name: str, wfi_manager: WFIManager, observer: Observer, routes: Routes, scheduler: Scheduler, streams: RandomStreams = None) -> None:
+        super().__init__(env, sT, name, wfi_manager, observer, routes, scheduler, streams)
 
         self.wfi_rates = {
             'UV373': 10,    # 90°C für CIP
@@ -495,35 +419,19 @@ class VK(Container):
         }
 
     def cip(self):
-        r1 = self.routes.rK1_VK
-        r2 = self.routes.rK2_VK
-        
-        with r1.request() as req:
-            yield req
+        with self.reserve('cip', self) as reservation:
+            yield reservation
 
-            with r2.request() as req1:
-                yield req1
-
-                with self.resource.request() as req2:
-                    yield req2
-
-                    start = self.env.now
-                    yield self.env.process(cip_knoten(self=self, wfi_rates=self.wfi_rates, durations=self.cip_durations))
-                    self.observer.add_task(task="CIP", resource=self.name, start=convertTime(start), end=convertTime(self.env.now))
-
-    def sip(self):
-        r1 = self.routes.rK1_VK
-        r2 = self.routes.rK2_VK
-        
-        with r1.request() as req:
-            yield req
-
-            with r2.request() as req1:
-                yield req1
-
-                with self.resource.request() as req2:
-                    yield req2
-
-                    start = self.env.now
-                    yield self.env.process(sip_default(self=self, durations=self.sip_durations))
-                    self.observer.add_task(task="SIP", resource=self.name, start=convertTime(start), end=convertTime(self.env.now))
+            start = self.env.now
+            yield self.env.process(cip_knoten(self=self, wfi_rates=self.wfi_rates, durations=self.cip_durations))
+            self.observer.add_task(task="CIP", resource=self.name, start=start, end=self.env.now)
+
+
+UNIT_TYPES = {
+    'LB': LB,
+    'AB': AB,
+    'Sole_Transfer': Sole_Transfer,
+    'Partikel': Partikel,
+    'Keimfilter': Keimfilter,
+    'VK': VK,
+}
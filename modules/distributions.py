@@ -0,0 +1,99 @@
+import math
+import numpy as np
+from collections import deque
+
+# Koeffizienten der rationalen Näherung von P. J. Acklam für die Normal-Quantilfunktion
+# (relativer Fehler < 1.2e-9, für Dauern in Sekunden mehr als ausreichend)
+_A = (-3.969683028665376e+01, 2.209460984245205e+02, -2.759285104469687e+02, 1.383577518672690e+02, -3.066479806614716e+01, 2.506628277459239e+00)
+_B = (-5.447609879822406e+01, 1.615858368580409e+02, -1.556989798598866e+02, 6.680131188771972e+01, -1.328068155288572e+01)
+_C = (-7.784894002430293e-03, -3.223964580411365e-01, -2.400758277161838e+00, -2.549732539343734e+00, 4.374664141464968e+00, 2.938163982698783e+00)
+_D = (7.784695709041462e-03, 3.224671290700398e-01, 2.445134137142996e+00, 3.754408661907416e+00)
+_P_LOW = 0.02425
+
+
+def norm_cdf(x: float) -> float:
+    return 0.5 * math.erfc(-x / math.sqrt(2))
+
+def norm_ppf(p: np.ndarray) -> np.ndarray:
+    p = np.asarray(p, dtype=float)
+    x = np.empty_like(p)
+
+    low = p < _P_LOW
+    high = p > 1 - _P_LOW
+    mid = ~(low | high)
+
+    q = p[mid] - 0.5
+    r = q * q
+    x[mid] = (((((_A[0] * r + _A[1]) * r + _A[2]) * r + _A[3]) * r + _A[4]) * r + _A[5]) * q / \
+             (((((_B[0] * r + _B[1]) * r + _B[2]) * r + _B[3]) * r + _B[4]) * r + 1)
+
+    for mask, sign in ((low, 1), (high, -1)):
+        q = np.sqrt(-2 * np.log(p[mask] if sign == 1 else 1 - p[mask]))
+        x[mask] = sign * (((((_C[0] * q + _C[1]) * q + _C[2]) * q + _C[3]) * q + _C[4]) * q + _C[5]) / \
+                  ((((_D[0] * q + _D[1]) * q + _D[2]) * q + _D[3]) * q + 1)
+    return x
+
+
+def truncnorm(lower: float, mean: float, upper: float, size, rng: np.random.Generator, std: float = None) -> np.ndarray:
+    # Inverse CDF statt Verwerfungsmethode: jede Ziehung trifft, auch bei schiefen Grenzen
+    std = std if std is not None else mean / 5
+    a = (lower - mean) / std
+    b = (upper - mean) / std
+
+    # Im rechten Ausläufer gespiegelt rechnen, damit die CDF nicht gegen 1 ausgelöscht wird
+    flip = a > 0
+    if flip:
+        a, b = -b, -a
+    u = rng.uniform(norm_cdf(a), norm_cdf(b), size)
+    z = norm_ppf(u)
+    z = -z if flip else z
+    return np.clip(mean + std * z, lower, upper)
+
+def triangular(lower: float, mean: float, upper: float, size, rng: np.random.Generator) -> np.ndarray:
+    # Modus so gewählt, dass der Erwartungswert dem Mittelwert entspricht (soweit innerhalb der Grenzen möglich)
+    mode = min(max(3 * mean - lower - upper, lower), upper)
+    return rng.triangular(lower, mode, upper, size)
+
+def pert(lower: float, mean: float, upper: float, size, rng: np.random.Generator, lamb: float = 4) -> np.ndarray:
+    # Modus aus dem PERT-Mittelwert (lower + lamb * mode + upper) / (lamb + 2) zurückgerechnet
+    span = upper - lower
+    mode = min(max(((lamb + 2) * mean - lower - upper) / lamb, lower), upper)
+    alpha = 1 + lamb * (mode - lower) / span
+    beta = 1 + lamb * (upper - mode) / span
+    return lower + span * rng.beta(alpha, beta, size)
+
+DISTRIBUTIONS = {
+    'truncnorm': truncnorm,
+    'triangular': triangular,
+    'pert': pert,
+}
+
+
+def sample_durations(durations: dict, size, rng: np.random.Generator, distribution: str = 'truncnorm') -> np.ndarray:
+    if durations['upper'] <= durations['lower']:
+        return np.full(size, round(durations['lower']), dtype=np.int64)
+    values = DISTRIBUTIONS[distribution](durations['lower'], durations['mean'], durations['upper'], size, rng)
+    return np.rint(values).astype(np.int64)
+
+
+class DurationSampler:
+    def __init__(self, rng: np.random.Generator, distribution: str = 'truncnorm', block: int = 16) -> None:
+        self.rng = rng
+        self.distribution = distribution
+        self.block = block
+        self._pending: dict[tuple, deque] = {}
+        self._preloaded: deque = deque()
+
+    def preload(self, values):
+        # Vorab gezogene Werte (z.B. eine Zeile einer Monte Carlo Tabelle) werden zuerst verbraucht
+        self._preloaded.extend(int(v) for v in values)
+
+    def draw(self, durations: dict) -> int:
+        if self._preloaded:
+            return self._preloaded.popleft()
+
+        key = (durations['lower'], durations['mean'], durations['upper'])
+        pending = self._pending.get(key)
+        if not pending:
+            pending = self._pending[key] = deque(sample_durations(durations, self.block, self.rng, self.distribution).tolist())
+        return pending.popleft()
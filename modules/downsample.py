@@ -0,0 +1,62 @@
+import numpy as np
+
+
+def lttb(x: np.ndarray, y: np.ndarray, n: int) -> tuple[np.ndarray, np.ndarray]:
+    # Largest Triangle Three Buckets (Steinarsson 2013): je Bucket der Punkt, der mit dem gewählten Punkt davor
+    # und dem Mittel des nächsten Buckets das größte Dreieck bildet. Erster und letzter Punkt bleiben erhalten.
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if n >= len(x) or n < 3:
+        return x, y
+
+    edges = np.linspace(1, len(x) - 1, n - 1).astype(int)
+    keep = np.empty(n, dtype=int)
+    keep[0], keep[-1] = 0, len(x) - 1
+    a = 0
+    for i in range(n - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nxt = slice(hi, edges[i + 2]) if i + 2 < len(edges) else slice(len(x) - 1, len(x))
+        cx, cy = x[nxt].mean(), y[nxt].mean()
+        area = np.abs((x[a] - cx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (cy - y[a]))
+        a = lo + int(np.argmax(area))
+        keep[i + 1] = a
+    return x[keep], y[keep]
+
+def minmax(x: np.ndarray, y: np.ndarray, n: int) -> tuple[np.ndarray, np.ndarray]:
+    # Je Bucket Minimum und Maximum in zeitlicher Reihenfolge, Spitzen gehen nie verloren
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if n >= len(x) or n < 2:
+        return x, y
+
+    edges = np.linspace(0, len(x), n // 2 + 1).astype(int)
+    keep = []
+    for lo, hi in zip(edges[:-1], edges[1:]):
+        if hi <= lo:
+            continue
+        keep.extend(sorted({lo + int(np.argmin(y[lo:hi])), lo + int(np.argmax(y[lo:hi]))}))
+    keep = np.asarray(keep)
+    return x[keep], y[keep]
+
+METHODS = {
+    'lttb': lttb,
+    'minmax': minmax,
+}
+
+
+def polyline(times: np.ndarray, values: np.ndarray, rates: np.ndarray, sT: float) -> tuple[np.ndarray, np.ndarray]:
+    # Exakter Verlauf aus den Änderungspunkten: vor jedem Punkt der linear fortgeschriebene alte Wert,
+    # danach der neue. Statt sT Sekundenwerte nur zwei Punkte je Änderung.
+    if len(times) == 0:
+        return np.array([0.0, sT]), np.zeros(2)
+    ends = np.append(times[1:], sT)
+    x = np.empty(2 * len(times))
+    y = np.empty(2 * len(times))
+    x[0::2], y[0::2] = times, values
+    x[1::2], y[1::2] = ends, values + rates * (ends - times)
+    if times[0] > 0:
+        x, y = np.concatenate(([0.0, times[0]], x)), np.concatenate(([0.0, 0.0], y))
+    return x, y
+
+def downsample(x: np.ndarray, y: np.ndarray, n: int, method: str = 'lttb') -> tuple[np.ndarray, np.ndarray]:
+    return METHODS[method](x, y, n)
@@ -0,0 +1,85 @@
+import simpy
+from modules.scheduler import Scheduler
+
+class FlowError(Exception):
+    pass
+
+
+class FlowLevel:
+    def __init__(self, env: simpy.Environment, scheduler: Scheduler, init: float = 0, capacity: float = float('inf')) -> None:
+        self.env = env
+        self.scheduler = scheduler
+        self.capacity = capacity
+        self.rate: float = 0.0      # Volumenstrom pro Sekunde
+        self._level: float = init
+        self._time: float = env.now
+        self._flows: int = 0
+
+    @property
+    def level(self) -> float:
+        return self.level_at(self.env.now)
+
+    def level_at(self, time: float) -> float:
+        # Füllstand ist stückweise linear zwischen zwei Ratenänderungen
+        return self._level + self.rate * (time - self._time)
+
+    def _settle(self):
+        self._level = min(max(self.level, 0), self.capacity)
+        self._time = self.env.now
+
+    def put(self, amount: float):
+        if self.level + amount > self.capacity:
+            raise FlowError(f'Füllstand {self.level + amount:.3f} überschreitet Kapazität {self.capacity}')
+        self._settle()
+        self._level += amount
+        self.scheduler.notify()
+
+    def get(self, amount: float):
+        if self.level - amount < 0:
+            raise FlowError(f'Entnahme {amount:.3f} größer als Füllstand {self.level:.3f}')
+        self._settle()
+        self._level -= amount
+        self.scheduler.notify()
+
+    def start(self, rate: float):
+        self._settle()
+        self._flows += 1
+        self.rate += rate
+        self.scheduler.notify()
+
+    def stop(self, rate: float):
+        self._settle()
+        self._flows -= 1
+        # Ohne aktive Ströme keine Rundungsreste in der Rate behalten
+        self.rate = self.rate - rate if self._flows else 0.0
+        self.scheduler.notify()
+
+    def flow(self, amount: float, duration: int):
+        if duration <= 0:
+            if amount >= 0:
+                self.put(amount)
+            else:
+                self.get(-amount)
+            return
+
+        if not 0 <= self.level + amount <= self.capacity + 1e-9:
+            raise FlowError(f'Füllstand {self.level + amount:.3f} außerhalb 0..{self.capacity}')
+
+        rate = amount / duration
+        self.start(rate)
+        yield self.env.timeout(duration)
+        self.stop(rate)
+
+
+def transfer(source: FlowLevel, target: FlowLevel, amount: float, duration: int):
+    if duration <= 0:
+        source.get(amount)
+        target.put(amount)
+        return
+
+    rate = amount / duration
+    source.start(-rate)
+    target.start(rate)
+    yield source.env.timeout(duration)
+    source.stop(-rate)
+    target.stop(rate)
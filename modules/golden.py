@@ -0,0 +1,114 @@
+import os
+import sys
+import argparse
+import contextlib
+from modules import cip, log
+from modules.scenario import SIM_TIME, simulate
+from modules.topology import generate_lines
+
+GOLDEN_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'golden')
+
+# Feste Szenarien: debug=True nutzt wie cip.DEBUG die Untergrenzen der CIP Dauern ohne Restzeit
+SCENARIOS = {
+    'reference_debug': dict(seed=0, debug=True),
+    'reference_seed1': dict(seed=1),
+    'reference_seed2_pert': dict(seed=2, distribution='pert'),
+    'lines4_seed1': dict(seed=1, sT=3 * 86400, topology=lambda: generate_lines(4), wfi_capacity=160),
+    # Knappes WFI, AB2 wird vorgezogen: Partikel und AB1 bekommen ihr WFI später als mit gleicher Priorität
+    'lines4_wfi_priority': dict(seed=1, sT=3 * 86400, topology=lambda: generate_lines(4), wfi_capacity=30, units={'AB2': {'wfi_priority': -1}}),
+}
+
+
+class TraceRecorder:
+    # Gleiche Schnittstelle wie trace.TraceWriter, hält aber nur Zustandswechsel und Aufgaben im Speicher
+    def __init__(self) -> None:
+        self.transitions: list[tuple] = []
+        self.tasks: list[tuple] = []
+
+    def transition(self, time: float, unit: str, machine: str, source, target):
+        self.transitions.append((time, unit, machine, source.name, target.name))
+
+    def wfi(self, *args):
+        pass
+
+    def route(self, *args):
+        pass
+
+    def task(self, unit: str, task: str, start: float, end: float):
+        self.tasks.append((start, end, unit, task))
+
+    def close(self):
+        pass
+
+    def lines(self) -> list[str]:
+        # Kanonisch: innerhalb eines Zeitpunkts nach Einheit sortiert, damit nur das Verhalten zählt,
+        # nicht die Reihenfolge, in der die Engine gleichzeitige Events abarbeitet
+        lines = [f'T {time:.0f} {unit} {machine} {source}->{target}' for time, unit, machine, source, target in sorted(self.transitions, key=lambda r: r[:3])]
+        lines += [f'K {start:.0f} {end:.0f} {unit} {task}' for start, end, unit, task in sorted(self.tasks, key=lambda r: (r[0], r[2]))]
+        return lines
+
+
+@contextlib.contextmanager
+def deterministic(debug: bool):
+    previous = cip.DEBUG
+    cip.DEBUG = debug
+    try:
+        yield
+    finally:
+        cip.DEBUG = previous
+
+def record(seed: int = 0, debug: bool = False, sT: int = SIM_TIME, topology=None, **kwargs) -> list[str]:
+    recorder = TraceRecorder()
+    topology = topology() if callable(topology) else topology
+    with deterministic(debug), log.configured(level=log.OFF):
+        run = simulate(sT=sT, seed=seed, topology=topology, trace=recorder, **kwargs)
+    return recorder.lines() + [f'M {run.makespan}']
+
+def golden_file(name: str, directory: str = GOLDEN_DIR) -> str:
+    return os.path.join(directory, f'{name}.trace')
+
+def first_divergence(expected: list[str], actual: list[str]) -> tuple[int, str, str] | None:
+    for i, (a, b) in enumerate(zip(expected, actual)):
+        if a != b:
+            return i + 1, a, b
+    if len(expected) != len(actual):
+        i = min(len(expected), len(actual))
+        return i + 1, expected[i] if i < len(expected) else '<Ende>', actual[i] if i < len(actual) else '<Ende>'
+    return None
+
+def check(name: str, directory: str = GOLDEN_DIR) -> tuple[int, str, str] | None:
+    with open(golden_file(name, directory), encoding='utf-8') as f:
+        expected = f.read().splitlines()
+    return first_divergence(expected, record(**SCENARIOS[name]))
+
+def update(name: str, directory: str = GOLDEN_DIR) -> str:
+    os.makedirs(directory, exist_ok=True)
+    file = golden_file(name, directory)
+    with open(file, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(record(**SCENARIOS[name])) + '\n')
+    return file
+
+
+def main(argv: list[str] = None):
+    parser = argparse.ArgumentParser(description='Vergleich deterministischer Läufe mit gespeicherten Golden Traces')
+    parser.add_argument('scenarios', nargs='*', default=list(SCENARIOS), help='Standard: alle')
+    parser.add_argument('--update', action='store_true', help='Golden Traces neu schreiben (nur nach gewollter Verhaltensänderung)')
+    args = parser.parse_args(argv)
+
+    failed = False
+    for name in args.scenarios:
+        if args.update:
+            print(f'{name: <24}aktualisiert {update(name)}')
+            continue
+        divergence = check(name)
+        if divergence is None:
+            print(f'{name: <24}ok')
+        else:
+            failed = True
+            line, expected, actual = divergence
+            print(f'{name: <24}abweichend ab Zeile {line}\n{"": <24}erwartet: {expected}\n{"": <24}erhalten: {actual}')
+    if failed:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+import numpy as np
+from modules.observer import Observer
+from modules.states import HYG_STAT
+
+PERCENTILES = (50, 90, 95, 99)
+STATES = [state.name for state in HYG_STAT]
+
+
+def step_durations(times: np.ndarray, sT: float) -> np.ndarray:
+    # Dauer, für die jeder Änderungswert bis zur nächsten Änderung (bzw. bis sT) gilt
+    return np.diff(np.append(np.minimum(times, sT), sT))
+
+def weighted_percentiles(values: np.ndarray, weights: np.ndarray, percentiles=PERCENTILES) -> np.ndarray:
+    # Zeitgewichtete Perzentile: Wert, unter dem p % der Zeit verbracht wurden
+    if len(values) == 0 or weights.sum() == 0:
+        return np.zeros(len(percentiles))
+    order = np.argsort(values, kind='stable')
+    cumulative = np.cumsum(weights[order]) / weights.sum()
+    idx = np.searchsorted(cumulative, np.asarray(percentiles) / 100, side='left')
+    return values[order][np.minimum(idx, len(values) - 1)]
+
+def _arrays(observer: Observer, subject: str, variable: str) -> tuple:
+    times, values, _ = observer.subjects[subject].variables[variable].buffer.arrays()
+    return times, values, step_durations(times, observer.sT)
+
+
+def time_in_state(observer: Observer) -> dict[str, dict[str, dict[str, float]]]:
+    # {Einheit: {'cip'|'sip': {Zustand: Sekunden}}}, Zeit vor der ersten Aufzeichnung zählt nicht
+    result = {}
+    for name, data in observer.subjects.items():
+        for machine, variable in (('cip', 'state.value'), ('sip', 'sip_state.value')):
+            if variable not in data.variables:
+                continue
+            _, values, durations = _arrays(observer, name, variable)
+            seconds = np.bincount(values.astype(int), weights=durations, minlength=len(STATES) + 1)[1:]
+            result.setdefault(name, {})[machine] = dict(zip(STATES, seconds.tolist()))
+    return result
+
+def wfi_demand(observer: Observer, subject: str = 'WFI-Manager', capacity: float = None) -> dict:
+    times, values, durations = _arrays(observer, subject, 'reserved_capacity')
+    capacity = capacity if capacity is not None else observer.subjects[subject].Obj.total_capacity
+    hist = np.bincount(values.astype(int), weights=durations, minlength=int(capacity) + 1)
+    mean = float(np.dot(values, durations) / observer.sT)
+    return dict(
+        peak=float(values.max()) if len(values) else 0.0,
+        mean=mean,
+        utilisation=mean / capacity if capacity else 0.0,
+        time_at_capacity=float(durations[values >= capacity].sum()),
+        percentiles=dict(zip((f'p{p}' for p in PERCENTILES), weighted_percentiles(values, durations).tolist())),
+        histogram=hist.tolist(),
+    )
+
+def route_occupancy(observer: Observer, subject: str = 'Routes') -> dict[str, float]:
+    # Anteil der Simulationszeit, in der ein Abschnitt reserviert war
+    result = {}
+    for variable in observer.subjects[subject].variables:
+        _, values, durations = _arrays(observer, subject, variable)
+        result[variable.partition('.')[2]] = float(np.dot(values, durations) / observer.sT)
+    return result
+
+def cht_slack(observer: Observer) -> dict[str, list[float]]:
+    # Je Reinigung: verbleibende Reinigungsstandzeit beim Verlassen von cleaned (Produktion, erneute Reinigung
+    # oder Ablauf). 0 heißt abgelaufen, noch offene Reinigungen werden bei sT bewertet.
+    result = {}
+    for name, data in observer.subjects.items():
+        if 'state.value' not in data.variables:
+            continue
+        times, values, durations = _arrays(observer, name, 'state.value')
+        cleaned = values == HYG_STAT.cleaned.value
+        result[name] = np.maximum(data.Obj.cht - durations[cleaned], 0).tolist()
+    return result
+
+def makespan(observer: Observer) -> dict:
+    unit, name, start, end = observer.tasks.arrays()
+    if len(end) == 0:
+        return dict(makespan=None, batches=[])
+    production = np.array([n == 'Produktion' for n in observer.tasks.names])[name] if len(name) else np.zeros(0, dtype=bool)
+    return dict(
+        makespan=int(end.max()),
+        batches=[dict(unit=observer.tasks.units[u], start=int(s), end=int(e), duration=int(e - s)) for u, s, e in zip(unit[production], start[production], end[production])],
+    )
+
+def kpis(observer: Observer) -> dict:
+    return dict(
+        time_in_state=time_in_state(observer),
+        wfi=wfi_demand(observer),
+        routes=route_occupancy(observer) if 'Routes' in observer.subjects else {},
+        cht_slack=cht_slack(observer),
+        **makespan(observer),
+    )
+
+
+def stacked(observers: list[Observer], percentiles=(5, 50, 95)) -> dict:
+    # Über Replikationen: Kennzahlen je Lauf als Matrix (Lauf x Größe) und deren Perzentile
+    runs = [kpis(observer) for observer in observers]
+    units = list(runs[0]['time_in_state'])
+    states = np.array([[[run['time_in_state'][u][m][s] for m in ('cip', 'sip') for s in STATES] for u in units] for run in runs])
+    segments = list(runs[0]['routes'])
+    routes = np.array([[run['routes'][s] for s in segments] for run in runs]).reshape(len(runs), len(segments))
+    wfi = np.array([[run['wfi']['peak'], run['wfi']['mean'], run['wfi']['utilisation'], run['wfi']['time_at_capacity']] for run in runs])
+    finished = np.array([run['makespan'] for run in runs if run['makespan'] is not None], dtype=float)
+
+    def bands(matrix: np.ndarray) -> dict:
+        return {f'p{p}': v for p, v in zip(percentiles, np.percentile(matrix, percentiles, axis=0).tolist())} if len(matrix) else {}
+
+    return dict(
+        runs=len(runs),
+        units=units,
+        states=[f'{m}.{s}' for m in ('cip', 'sip') for s in STATES],
+        time_in_state=states,
+        time_in_state_mean=states.mean(axis=0),
+        segments=segments,
+        route_occupancy=routes,
+        route_occupancy_bands=bands(routes),
+        wfi_columns=['peak', 'mean', 'utilisation', 'time_at_capacity'],
+        wfi=wfi,
+        wfi_bands=bands(wfi),
+        makespan=bands(finished),
+        finished=len(finished),
+    )
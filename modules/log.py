@@ -0,0 +1,160 @@
+import sys
+import json
+import struct
+import contextlib
+import simpy
+from modules.tools import convertTime
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+OFF = 100
+
+LEVEL_NAMES = {DEBUG: 'DEBUG', INFO: 'INFO', WARNING: 'WARNING', OFF: 'OFF'}
+
+
+class BinarySink:
+    # Ereignisse als feste Datensätze: Zeit, Level, Subsystem, Vorlage, Anzahl Argumente, dann je Argument
+    # ein Typ-Byte und der Wert. Zahlen werden direkt gepackt, nur Texte (Vorlagen, Subsysteme, Namen, Zustände)
+    # kommen einmalig in <path>.json, damit die Tabelle bei langen Läufen nicht mit jedem Wert wächst.
+    HEADER = struct.Struct('<dBHHB')
+    TAG = struct.Struct('<B')
+    ARGS = {0: struct.Struct('<q'), 1: struct.Struct('<d'), 2: struct.Struct('<I')}
+    INT, FLOAT, TEXT = 0, 1, 2
+
+    def __init__(self, path: str, flush_size: int = 1 << 16) -> None:
+        self.path = path
+        self.flush_size = flush_size
+        self.strings: dict[str, int] = {}
+        self._buffer = bytearray()
+        self._file = open(path, 'wb')
+
+    def _id(self, text: str) -> int:
+        id = self.strings.get(text)
+        if id is None:
+            id = self.strings[text] = len(self.strings)
+        return id
+
+    def _pack(self, arg) -> bytes:
+        if isinstance(arg, int) and not isinstance(arg, bool) and -2**63 <= arg < 2**63:
+            tag, value = self.INT, arg
+        elif isinstance(arg, float):
+            tag, value = self.FLOAT, arg
+        else:
+            tag, value = self.TEXT, self._id(str(arg))
+        return self.TAG.pack(tag) + self.ARGS[tag].pack(value)
+
+    def write(self, time: float, level: int, subsystem: str, template: str, args: tuple):
+        buffer = self._buffer
+        buffer += self.HEADER.pack(time, level, self._id(subsystem), self._id(template), len(args))
+        for arg in args:
+            buffer += self._pack(arg)
+        if len(buffer) >= self.flush_size:
+            self.flush()
+
+    def flush(self):
+        self._file.write(self._buffer)
+        self._buffer.clear()
+
+    def close(self):
+        self.flush()
+        self._file.close()
+        with open(f'{self.path}.json', 'w', encoding='utf-8') as f:
+            json.dump(list(self.strings), f, ensure_ascii=False)
+
+
+def read_events(path: str) -> list[tuple]:
+    # -> [(zeit, level, subsystem, nachricht), ...]
+    with open(f'{path}.json', encoding='utf-8') as f:
+        strings = json.load(f)
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    events = []
+    offset = 0
+    header, tag = BinarySink.HEADER, BinarySink.TAG
+    while offset < len(data):
+        time, level, subsystem, template, n = header.unpack_from(data, offset)
+        offset += header.size
+        args = []
+        for _ in range(n):
+            kind = tag.unpack_from(data, offset)[0]
+            value = BinarySink.ARGS[kind].unpack_from(data, offset + tag.size)[0]
+            offset += tag.size + BinarySink.ARGS[kind].size
+            args.append(strings[value] if kind == BinarySink.TEXT else value)
+        events.append((time, level, strings[subsystem], strings[template] % tuple(args)))
+    return events
+
+
+class Config:
+    def __init__(self, level: int = WARNING, subsystems: dict[str, int] = None, sink: BinarySink = None, sink_level: int = DEBUG, stream=None) -> None:
+        self.level = level
+        self.subsystems = subsystems or {}
+        self.sink = sink
+        self.sink_level = sink_level
+        self.stream = stream
+
+    def console_level(self, subsystem: str) -> int:
+        return self.subsystems.get(subsystem, self.level)
+
+
+_config = Config()
+_loggers: dict[str, 'Logger'] = {}
+
+
+class Logger:
+    __slots__ = ('name', 'level', 'console_level')
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._update()
+
+    def _update(self):
+        # Niedrigstes Level, das irgendwo ankommt. Alles darunter kostet nur diesen Vergleich.
+        self.console_level = _config.console_level(self.name)
+        self.level = min(self.console_level, _config.sink_level if _config.sink is not None else OFF)
+
+    def log(self, level: int, env: simpy.Environment, template: str, *args):
+        if level < self.level:
+            return
+        if level >= self.console_level:
+            time = convertTime(env.now)
+            time = f'{time[0]}:{time[1]:02d}:{time[2]:02d}'
+            print(f'{time: ^20}{self.name: <25}{template % args}', file=_config.stream or sys.stdout)
+        if _config.sink is not None and level >= _config.sink_level:
+            _config.sink.write(env.now, level, self.name, template, args)
+
+    def debug(self, env: simpy.Environment, template: str, *args):
+        if DEBUG >= self.level:
+            self.log(DEBUG, env, template, *args)
+
+    def info(self, env: simpy.Environment, template: str, *args):
+        if INFO >= self.level:
+            self.log(INFO, env, template, *args)
+
+    def warning(self, env: simpy.Environment, template: str, *args):
+        if WARNING >= self.level:
+            self.log(WARNING, env, template, *args)
+
+
+def get_logger(subsystem: str) -> Logger:
+    if subsystem not in _loggers:
+        _loggers[subsystem] = Logger(subsystem)
+    return _loggers[subsystem]
+
+def configure(level: int = WARNING, subsystems: dict[str, int] = None, sink: BinarySink = None, sink_level: int = DEBUG, stream=None) -> Config:
+    # subsystems = {'CIP': DEBUG, 'Status C Change': OFF}, nicht aufgeführte Subsysteme nutzen level
+    global _config
+    previous = _config
+    _config = Config(level, subsystems, sink, sink_level, stream)
+    for logger in _loggers.values():
+        logger._update()
+    return previous
+
+@contextlib.contextmanager
+def configured(**kwargs):
+    previous = configure(**kwargs)
+    try:
+        yield _config
+    finally:
+        configure(previous.level, previous.subsystems, previous.sink, previous.sink_level, previous.stream)
@@ -1,51 +1,159 @@
+import os
 from modules.observer import Observer
-from modules.tools import convertTime
+from modules.storage import StoredRun
+from modules.downsample import polyline, downsample
 
 import numpy as np
-import pandas as pd
-import matplotlib.pyplot as plt
-from matplotlib.dates import DateFormatter
-import plotly.express as px
 
+# matplotlib, pandas und plotly werden erst beim Zeichnen geladen, series_data und percentile_bands kommen ohne sie aus
 
-def plot(observer: Observer):
-    plt.rcParams["figure.figsize"] = (10, 10)
+
+def _time_formatter(sT: int):
+    from matplotlib.dates import DateFormatter
+    if sT <= 86400:
+        return DateFormatter('%H:%M:%S')
+    return DateFormatter('%d-%H:%M:%S')
+
+def _figure(output: str, rows: int):
+    import matplotlib.pyplot as plt
+    from matplotlib.figure import Figure
+    # Mit Ausgabeverzeichnis ohne pyplot zeichnen, damit kein GUI Backend benötigt wird
+    if output is not None:
+        fig = Figure(figsize=(10, max(4, 3.3 * rows)))
+        return fig, fig.subplots(rows, squeeze=False)[:, 0]
+    fig, axes = plt.subplots(rows, squeeze=False, figsize=(10, 10))
+    return fig, axes[:, 0]
+
+def _save(fig, output: str, name: str, formats: tuple) -> list[str]:
+    os.makedirs(output, exist_ok=True)
+    files = []
+    for format in formats:
+        file = os.path.join(output, f'{name}.{format}')
+        if format == 'html':
+            fig.write_html(file, include_plotlyjs='cdn')
+        else:
+            fig.savefig(file, bbox_inches='tight')
+        files.append(file)
+    return files
+
+def series_data(observer: Observer, max_points: int = 2000, method: str = 'lttb') -> dict[str, list]:
+    # {variable: [(subject, x, y), ...]} mit x in Sekunden, höchstens max_points Punkte je Verlauf
     variable_data = {}
     for subject_name, data in observer.subjects.items():
-        for variable_name, values in data.variables.items():
-            if variable_name not in variable_data:
-                variable_data[variable_name] = []
-            variable_data[variable_name].append((subject_name, values))
+        # Variablen mit gleichem Präfix (z.B. occupancy.<Abschnitt>) teilen sich ein Diagramm
+        prefixes = [name.partition('.')[0] for name in data.variables]
+        for variable_name, series in data.variables.items():
+            prefix, _, suffix = variable_name.partition('.')
+            label = subject_name if prefixes.count(prefix) == 1 else f'{subject_name} {suffix}'
+            times, values, rates = series.buffer.arrays()
+            x, y = downsample(*polyline(times, values, rates, observer.sT), max_points, method)
+            variable_data.setdefault(prefix, []).append((label, x, y))
+    return variable_data
 
-    fig, axes = plt.subplots(len(variable_data))
-    fig.subplots_adjust(hspace=0.3)
 
-    x = np.arange(observer.sT)
-    x = x / 60
-    t = pd.to_datetime(x, unit='m')
+def plot(observer: Observer, output: str = None, formats: tuple = ('png',), max_points: int = 2000, method: str = 'lttb') -> list[str]:
+    import pandas as pd
+    import matplotlib.pyplot as plt
+    import plotly.graph_objects as go
+
+    variable_data = series_data(observer, max_points, method)
+
+    if output is not None and 'html' in formats:
+        html = go.Figure()
+        for variable_name, subject_data in variable_data.items():
+            for subject_name, x, y in subject_data:
+                html.add_trace(go.Scattergl(x=pd.to_datetime(x, unit='s'), y=y, name=f'{subject_name} {variable_name}'))
+        files = _save(html, output, 'plot', ('html',))
+        formats = tuple(f for f in formats if f != 'html')
+    else:
+        files = []
+
+    if output is not None and not formats:
+        return files
+
+    fig, axes = _figure(output, len(variable_data))
+    fig.subplots_adjust(hspace=0.3)
 
     for i, (variable_name, subject_data) in enumerate(variable_data.items()):
         axes[i].set_title(f"{variable_name}")
-        for subject_name, values in subject_data:
-            axes[i].plot(t, values, label=subject_name)
+        for subject_name, x, y in subject_data:
+            axes[i].plot(pd.to_datetime(x, unit='s'), y, label=subject_name)
         axes[i].legend()
+        axes[i].xaxis.set_major_formatter(_time_formatter(observer.sT))
 
-        if observer.sT <= 86400:
-            x_axis_formatter = DateFormatter('%H:%M:%S')
-        else:
-            x_axis_formatter = DateFormatter('%d-%H:%M:%S')
+    if output is None:
+        plt.show()
+        return files
+    return files + _save(fig, output, 'plot', formats)
+
+def gantt(observer: Observer, output: str = None, formats: tuple = ('html',)) -> list[str]:
+    import pandas as pd
+    import matplotlib.pyplot as plt
+    import plotly.express as px
+
+    df = observer.tasks.frame()
+    s = pd.to_datetime(0, unit='s')
+    e = pd.to_datetime(observer.sT, unit='s')
+    tickformat = '%H:%M:%S' if observer.sT <= 86400 else '%d-%H:%M:%S'
+
+    files = []
+    if output is None or 'html' in formats:
+        fig = px.timeline(df, x_start="Start", x_end="Finish", y="Task", color="Resource")
+        fig.update_layout(xaxis=dict(title='Timestamp', tickformat = tickformat, autorange=True, autorangeoptions=dict(minallowed=s, maxallowed=e) ))
+        fig.update_yaxes(autorange="reversed")
+        if output is None:
+            fig.show()
+            return files
+        files += _save(fig, output, 'gantt', ('html',))
+
+    static = tuple(f for f in formats if f != 'html')
+    if static:
+        # Statische Formate mit matplotlib, plotly bräuchte dafür kaleido
+        fig, (ax,) = _figure(output, 1)
+        units = list(dict.fromkeys(df['Task']))
+        colors = {name: f'C{i}' for i, name in enumerate(dict.fromkeys(df['Resource']))}
+        start, end = observer.tasks.arrays()[2:]
+        for i, (unit, task) in enumerate(zip(df['Task'], df['Resource'])):
+            ax.broken_barh([(start[i], end[i] - start[i])], (units.index(unit) - 0.4, 0.8), color=colors[task])
+        ax.set_yticks(range(len(units)), units)
+        ax.invert_yaxis()
+        ax.set_xlim(0, observer.sT)
+        ax.xaxis.set_major_formatter(lambda x, _: pd.to_datetime(x, unit='s').strftime(tickformat))
+        ax.legend(handles=[plt.Rectangle((0, 0), 1, 1, color=c) for c in colors.values()], labels=list(colors))
+        files += _save(fig, output, 'gantt', static)
+    return files
+
+
+def _values(run: Observer | StoredRun, key: str, t: np.ndarray) -> np.ndarray:
+    if isinstance(run, StoredRun):
+        return run.at(key, t)
+    subject, variable = key.split('/', 1)
+    return run.subjects[subject].variables[variable].at(t)
+
+def percentile_bands(runs: list[Observer | StoredRun], key: str, sT: int, points: int = 1000, percentiles: tuple = (5, 25, 50, 75, 95)) -> tuple[np.ndarray, np.ndarray]:
+    # key = 'WFI-Manager/reserved_capacity', alle Läufe auf einem gemeinsamen Raster ausgewertet
+    t = np.linspace(0, sT, points, endpoint=False)
+    stacked = np.vstack([_values(run, key, t) for run in runs])
+    return t, np.percentile(stacked, percentiles, axis=0)
 
-        axes[i].xaxis.set_major_formatter(x_axis_formatter)
+def bands(runs: list[Observer | StoredRun], key: str, sT: int, output: str = None, formats: tuple = ('png',), points: int = 1000, percentiles: tuple = (5, 25, 50, 75, 95)) -> list[str]:
+    import pandas as pd
+    import matplotlib.pyplot as plt
 
-    plt.show()
+    t, values = percentile_bands(runs, key, sT, points, percentiles)
+    x = pd.to_datetime(t, unit='s')
 
-def gantt(observer: Observer):
-    df = pd.DataFrame(observer.tasks)
-    sT = convertTime(observer.sT)
-    s = f"1970-01-01 00:00:00"
-    e = f"1970-01-01 {sT[0]:02}:{sT[1]:02}:{sT[2]:02}"
+    fig, (ax,) = _figure(output, 1)
+    ax.set_title(f'{key} ({len(runs)} Läufe)')
+    # Bänder symmetrisch von außen nach innen, der mittlere Perzentilwert als Linie
+    for i in range(len(percentiles) // 2):
+        ax.fill_between(x, values[i], values[-1 - i], alpha=0.2, color='C0', linewidth=0, label=f'p{percentiles[i]}-p{percentiles[-1 - i]}')
+    if len(percentiles) % 2:
+        ax.plot(x, values[len(percentiles) // 2], color='C0', label=f'p{percentiles[len(percentiles) // 2]}')
+    ax.legend()
+    ax.xaxis.set_major_formatter(_time_formatter(sT))
 
-    fig = px.timeline(df, x_start="Start", x_end="Finish", y="Task", color="Resource")
-    fig.update_layout(xaxis=dict(title='Timestamp', tickformat = '%H:%M:%S', autorange=True, autorangeoptions=dict(minallowed=s, maxallowed=e) ))
-    fig.update_yaxes(autorange="reversed")
-    fig.show()
+    if output is None:
+        plt.show()
+        return []
+    return _save(fig, output, f"bands_{key.replace('/', '_')}", formats)
@@ -0,0 +1,110 @@
+import os
+import numpy as np
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+from modules.scenario import SIM_TIME, simulate, duration_table
+from modules.streams import RandomStreams
+from modules.distributions import sample_durations
+from modules import log
+from modules.trace import TraceWriter
+from modules.profiling import Profiler, merge_reports
+from modules.accumulators import SummaryStore, SummaryError
+
+PERCENTILES = (5, 25, 50, 75, 95)
+
+
+def replication_seeds(n: int, seed: int = 0) -> list[int]:
+    return [int(s.generate_state(1)[0]) for s in np.random.SeedSequence(seed).spawn(n)]
+
+def predraw(n: int, seed: int = 0, distribution: str = 'truncnorm', draws: int = 1, sT: int = SIM_TIME, units: dict = None, topology: str | dict = None) -> dict:
+    # Alle Dauern aller Replikationen in einem Schritt je Container und Phase ziehen,
+    # Zeile i gehört zu Replikation i
+    streams = RandomStreams(seed)
+    return {key: sample_durations(durations, (n, draws), streams.stream('batch', *key), distribution) for key, durations in duration_table(sT, units, topology).items()}
+
+def replicate(seed: int, predrawn: dict = None, sT: int = SIM_TIME, wfi_capacity: int = 40, distribution: str = 'truncnorm', units: dict = None, topology: str | dict = None, trace_dir: str = None, profile: bool = False, thresholds: dict = None, goal=None) -> dict:
+    # trace_dir: je Replikation ein Satz Trace Dateien, Lauf-Id ist der Seed
+    # goal: Abbruchkriterium wie in simulate, Mittelwerte gelten dann bis zum Ende des Laufs statt bis sT
+    trace = TraceWriter(trace_dir, run=seed) if trace_dir is not None else None
+    profiler = Profiler() if profile else None
+    # Kein Verlauf je Variable, nur laufende Kennzahlen: das Ergebnis bleibt wenige KB groß, unabhängig von sT
+    store = SummaryStore(thresholds if thresholds is not None else {'WFI-Manager/available_capacity': (0,)})
+    with log.configured(level=log.OFF):
+        run = simulate(sT=sT, wfi_capacity=wfi_capacity, store=store, seed=seed, distribution=distribution, predrawn=predrawn, units=units, topology=topology, trace=trace, profiler=profiler, goal=goal)
+
+    summaries = store.summaries
+    reserved = summaries[f'{run.wfi.name}/reserved_capacity']
+    if reserved['distribution'] is None:
+        raise SummaryError(f"Mehr als {store.max_exact} verschiedene WFI Stufen, kein exaktes Histogramm (max_exact erhöhen)")
+    # CEW Reservierungen können über die Kapazität hinausgehen, daher mindestens bis zur Spitze
+    levels = np.array([int(float(value)) for value in reserved['distribution']], dtype=int)
+    hist = np.bincount(levels, weights=list(reserved['distribution'].values()), minlength=wfi_capacity + 1)
+
+    result = dict(
+        seed=seed,
+        makespan=run.makespan,
+        wfi_peak=float(reserved['max'] or 0.0),
+        wfi_mean=reserved['mean'],
+        wfi_utilisation=reserved['mean'] / wfi_capacity,
+        wfi_wait=float(np.sum(run.wfi.wait_times)),
+        wfi_hist=hist.tolist(),
+        wfi_available=summaries[f'{run.wfi.name}/available_capacity'],
+        # {'Einheit/Variable': Zusammenfassung} für Zustände und Routenabschnitte
+        series={key: summary for key, summary in summaries.items() if not key.startswith(f'{run.wfi.name}/')},
+    )
+    if profiler is not None:
+        result['profile'] = profiler.report()
+    return result
+
+def summarize(values: list[float]) -> dict:
+    if not values:
+        return dict(n=0)
+    values = np.asarray(values, dtype=float)
+    summary = dict(n=len(values), mean=float(values.mean()), std=float(values.std()), min=float(values.min()), max=float(values.max()))
+    summary.update({f'p{p}': float(v) for p, v in zip(PERCENTILES, np.percentile(values, PERCENTILES))})
+    return summary
+
+def aggregate(results: list[dict]) -> dict:
+    finished = [r['makespan'] for r in results if r['makespan'] is not None]
+    length = max(len(r['wfi_hist']) for r in results)
+    hist = np.zeros(length)
+    for r in results:
+        hist[:len(r['wfi_hist'])] += r['wfi_hist']
+
+    summary = dict(
+        replications=len(results),
+        finished=len(finished),
+        makespan=summarize(finished),
+        wfi_peak=summarize([r['wfi_peak'] for r in results]),
+        wfi_utilisation=summarize([r['wfi_utilisation'] for r in results]),
+        wfi_wait=summarize([r['wfi_wait'] for r in results]),
+        # Anteil der Simulationszeit je belegter WFI Menge über alle Läufe
+        wfi_distribution=(hist / hist.sum()).tolist() if hist.sum() else hist.tolist(),
+        runs=results,
+    )
+    profiles = [r['profile'] for r in results if 'profile' in r]
+    if profiles:
+        summary['profile'] = merge_reports(profiles)
+    return summary
+
+def run_replications(n: int, seed: int = 0, workers: int = None, sT: int = SIM_TIME, wfi_capacity: int = 40, distribution: str = 'truncnorm', draws: int = 1, units: dict = None, topology: str | dict = None, trace_dir: str = None, profile: bool = False, thresholds: dict = None, goal=None) -> dict:
+    seeds = replication_seeds(n, seed)
+    table = predraw(n, seed, distribution, draws, sT, units, topology)
+    rows = [{key: values[i] for key, values in table.items()} for i in range(n)]
+    workers = workers or os.cpu_count()
+    chunksize = max(1, n // (workers * 4))
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(partial(replicate, sT=sT, wfi_capacity=wfi_capacity, distribution=distribution, units=units, topology=topology, trace_dir=trace_dir, profile=profile, thresholds=thresholds, goal=goal), seeds, rows, chunksize=chunksize))
+
+    return aggregate(results)
+
+def paired_difference(a: dict, b: dict, key: str = 'makespan') -> dict:
+    # Mit gleichem Seed sehen beide Szenarien dieselben Zufallszahlen (Common Random Numbers),
+    # die Differenz je Replikation hat daher deutlich weniger Varianz als zwei unabhängige Läufe
+    pairs = [(ra[key], rb[key]) for ra, rb in zip(a['runs'], b['runs']) if ra['seed'] == rb['seed'] and ra[key] is not None and rb[key] is not None]
+    differences = [vb - va for va, vb in pairs]
+    summary = summarize(differences)
+    if len(differences) > 1:
+        summary['stderr'] = float(np.std(differences, ddof=1) / np.sqrt(len(differences)))
+    return summary
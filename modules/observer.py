@@ -1,45 +1,94 @@
 import numpy as np
-from typing import Dict, Any
+from operator import attrgetter
+from typing import Dict, Any, Callable
 from collections import namedtuple
-
-def get_nested_attribute(obj, attr_string):
-    attrs = attr_string.split('.')
-    for attr in attrs:
-        try:
-            obj = getattr(obj, attr)
-        except AttributeError:
-            return None
-    return obj
+from modules.storage import MemoryBuffer, ChunkBuffer, MemoryStore, ChunkedStore, evaluate
+from modules.trace import TraceWriter
+from modules.tasks import TaskStore
 
 SubjectData = namedtuple('SubjectData', ['Obj', 'name', 'variables'])
 
+class Series:
+    def __init__(self, getter: Callable, rate_getter: Callable = None, buffer: MemoryBuffer | ChunkBuffer = None) -> None:
+        self.getter = getter
+        self.rate_getter = rate_getter
+        # Nur Änderungspunkte: ab time gilt value + rate * (t - time)
+        self.buffer = buffer if buffer is not None else MemoryBuffer()
+
+    def __len__(self) -> int:
+        return len(self.buffer)
+
+    def record(self, time: float):
+        value = self.getter()
+        rate = self.rate_getter() if self.rate_getter is not None else 0.0
+
+        last = self.buffer.last()
+        if last is not None:
+            last_time, last_value, last_rate = last
+            if last_time == time:
+                self.buffer.replace_last(time, value, rate)
+                return
+            if rate == last_rate and value == last_value + last_rate * (time - last_time):
+                return
+
+        self.buffer.append(time, value, rate)
+
+    def at(self, t: np.ndarray) -> np.ndarray:
+        t = np.asarray(t, dtype=float)
+        if t.size == 0:
+            return np.zeros(0)
+        return evaluate(*self.buffer.arrays(t.min(), t.max()), t)
+
+    def dense(self, sT: int) -> np.ndarray:
+        return self.at(np.arange(sT, dtype=float))
+
+
 class Observer:
-    def __init__(self, sT: int) -> None:
+    def __init__(self, sT: int, store: MemoryStore | ChunkedStore = None, trace: TraceWriter = None) -> None:
         self.sT: int = sT
+        self.store = store if store is not None else MemoryStore()
+        self.trace = trace
         self.subjects: Dict[str, SubjectData] = {}
-        self.tasks = []
+        self.tasks = TaskStore()
+        self.probes: list[Series] = []
 
-    def add_variable(self, name: str, subject: Any, variable_name: str):
-        values = np.zeros(self.sT)
+    def add_variable(self, name: str, subject: Any, variable_name: str, rate_name: str = None):
         if subject.name not in self.subjects:
             self.subjects[subject.name] = SubjectData(subject, name, {})
 
-        self.subjects[subject.name].variables[variable_name] = values
+        # Pfad wird einmalig in einen Zugriff übersetzt statt bei jedem Durchlauf zerlegt
+        getter = attrgetter(variable_name)
+        rate_getter = None
+        if rate_name is not None:
+            # Variable ändert sich linear mit rate_name zwischen zwei Änderungen
+            rate = attrgetter(rate_name)
+            rate_getter = lambda: rate(subject)
+
+        buffer = self.store.buffer(f'{subject.name}/{variable_name}')
+        series = Series(lambda: getter(subject), rate_getter, buffer)
+        self.subjects[subject.name].variables[variable_name] = series
+        self.probes.append(series)
 
-    def add_task(self, task, resource, start, end):
-        s = f"1970-01-01 {start[0]:02}:{start[1]:02}:{start[2]:02}"
-        f = f"1970-01-01 {end[0]:02}:{end[1]:02}:{end[2]:02}"
-        # self.tasks.append(dict(Task=f"{task}-{resource}", Start=s, Finish=f, Resource=resource))
-        # self.tasks.append(dict(Task=f"{task}", Start=s, Finish=f, Resource=resource))
-        self.tasks.append(dict(Task=f"{resource}", Start=s, Finish=f, Resource=task))
+    def add_task(self, task: str, resource: str, start: int, end: int):
+        # start/end in Sekunden Simulationszeit
+        self.tasks.add(resource, task, start, end)
+        if self.trace is not None:
+            self.trace.task(resource, task, start, end)
 
     def cycle(self, current_time: int):
-        for sub, data in self.subjects.items():
-            obj = data.Obj
-
-            for variable_name, values in data.variables.items():
-                if '.' in variable_name:
-                    value = get_nested_attribute(obj, variable_name)
-                else:
-                    value = getattr(obj, variable_name)
-                values[current_time] = value
+        if current_time >= self.sT:
+            return
+
+        for series in self.probes:
+            series.record(current_time)
+
+    def dense(self, subject_name: str, variable_name: str) -> np.ndarray:
+        return self.subjects[subject_name].variables[variable_name].dense(self.sT)
+
+    def close(self, end: int = None):
+        # end: Lauf vorzeitig beendet, Reihen und Auswertungen gelten nur bis dorthin
+        if end is not None:
+            self.sT = min(self.sT, end)
+        self.store.close(sT=self.sT)
+        if self.trace is not None:
+            self.trace.close()
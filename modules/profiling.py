@@ -0,0 +1,166 @@
+import json
+import simpy
+from time import perf_counter
+from simpy.core import EmptySchedule
+from simpy.events import Process, NORMAL
+
+
+class QueueStats:
+    def __init__(self) -> None:
+        self.length = 0
+        self.time = 0.0
+        self.area = 0.0
+        self.max = 0
+        self.busy = 0.0
+
+    def update(self, now: float, length: int):
+        # Zeitgewichtet: die bisherige Länge galt seit der letzten Änderung
+        if length == self.length:
+            return
+        span = now - self.time
+        self.area += self.length * span
+        if self.length:
+            self.busy += span
+        self.length = length
+        self.time = now
+        self.max = max(self.max, length)
+
+    def report(self, now: float) -> dict:
+        span = now - self.time
+        area = self.area + self.length * span
+        busy = self.busy + (span if self.length else 0.0)
+        return dict(mean=area / now if now else 0.0, max=self.max, time_waiting=busy)
+
+
+class ProfiledEnvironment(simpy.Environment):
+    # Zählt je Prozess (Generatorfunktion) und je Phase die eingeplanten Events, Schritte und die Rechenzeit.
+    # Nur für Läufe mit Profiler, ohne Profiler läuft das normale simpy.Environment ohne Mehraufwand.
+    def __init__(self, profiler: 'Profiler', initial_time: float = 0) -> None:
+        super().__init__(initial_time)
+        self.profiler = profiler
+
+    def process(self, generator) -> Process:
+        process = super().process(generator)
+        self.profiler.started(process)
+        return process
+
+    def schedule(self, event: simpy.Event, priority=NORMAL, delay=0):
+        self.profiler.scheduled(self.active_process)
+        super().schedule(event, priority, delay)
+
+    def step(self):
+        if not self._queue:
+            raise EmptySchedule()
+        event = self._queue[0][3]
+        processes = [callback.__self__ for callback in event.callbacks or () if isinstance(getattr(callback, '__self__', None), Process)]
+        start = perf_counter()
+        super().step()
+        self.profiler.stepped(processes, perf_counter() - start)
+
+
+def process_name(process: Process) -> str:
+    return getattr(process._generator, '__qualname__', type(process._generator).__name__)
+
+
+class Profiler:
+    def __init__(self) -> None:
+        self.env: ProfiledEnvironment = None
+        self.processes: dict[str, dict] = {}
+        self.phases: dict[str, dict] = {}
+        self.queues: dict[str, QueueStats] = {}
+        self._watchers: list = []
+        self.events = 0
+        self.steps = 0
+        self.wall_time = 0.0
+
+    def environment(self, initial_time: float = 0) -> ProfiledEnvironment:
+        self.env = ProfiledEnvironment(self, initial_time)
+        return self.env
+
+    def _stats(self, table: dict, key: str) -> dict:
+        stats = table.get(key)
+        if stats is None:
+            stats = table[key] = dict(events=0, steps=0, wall_time=0.0)
+            if table is self.processes:
+                stats['instances'] = 0
+        return stats
+
+    def started(self, process: Process):
+        self._stats(self.processes, process_name(process))['instances'] += 1
+
+    def scheduled(self, process: Process | None):
+        self.events += 1
+        if process is None:
+            return
+        self._stats(self.processes, process_name(process))['events'] += 1
+        phase = getattr(process, 'phase', None)
+        if phase is not None:
+            self._stats(self.phases, phase)['events'] += 1
+
+    def stepped(self, processes: list[Process], wall_time: float):
+        self.steps += 1
+        self.wall_time += wall_time
+        # Laufen mehrere Prozesse auf dasselbe Event weiter, wird die Zeit gleichmäßig aufgeteilt
+        share = wall_time / len(processes) if processes else 0.0
+        for process in processes:
+            stats = self._stats(self.processes, process_name(process))
+            stats['steps'] += 1
+            stats['wall_time'] += share
+            phase = getattr(process, 'phase', None)
+            if phase is not None:
+                stats = self._stats(self.phases, phase)
+                stats['steps'] += 1
+                stats['wall_time'] += share
+        now = self.env.now
+        for name, length in self._watchers:
+            self.queues[name].update(now, length())
+
+    def watch(self, name: str, length):
+        # length() -> aktuelle Warteschlangenlänge, wird nach jedem Schritt abgefragt
+        self.queues[name] = QueueStats()
+        self._watchers.append((name, length))
+
+    def attach(self, routes, wfi):
+        self.watch(wfi.name, lambda: len(wfi.container_queue))
+        self.watch(routes.name, lambda: len(routes.queue))
+        for slot, name in enumerate(routes.slot_names):
+            self.watch(f'{routes.name}/{name}', lambda slot=slot: sum(slot in reservation.slots for reservation in routes.queue))
+
+    def report(self) -> dict:
+        now = self.env.now if self.env is not None else 0
+        return dict(
+            sim_time=now,
+            events=self.events,
+            steps=self.steps,
+            wall_time=self.wall_time,
+            events_per_second=self.steps / self.wall_time if self.wall_time else 0.0,
+            processes=dict(sorted(self.processes.items(), key=lambda item: -item[1]['wall_time'])),
+            phases=dict(sorted(self.phases.items(), key=lambda item: -item[1]['wall_time'])),
+            queues={name: stats.report(now) for name, stats in self.queues.items()},
+        )
+
+    def write(self, path: str) -> dict:
+        report = self.report()
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        return report
+
+
+def merge_reports(reports: list[dict]) -> dict:
+    # Zähler und Zeiten über Läufe summieren, Warteschlangen als Mittel der Mittelwerte und Maximum der Maxima
+    merged = dict(runs=len(reports), events=0, steps=0, wall_time=0.0, processes={}, phases={}, queues={})
+    for report in reports:
+        for key in ('events', 'steps', 'wall_time'):
+            merged[key] += report[key]
+        for table in ('processes', 'phases'):
+            for name, stats in report[table].items():
+                target = merged[table].setdefault(name, dict.fromkeys(stats, 0))
+                for key, value in stats.items():
+                    target[key] += value
+        for name, stats in report['queues'].items():
+            target = merged['queues'].setdefault(name, dict(mean=0.0, max=0, time_waiting=0.0))
+            target['mean'] += stats['mean'] / len(reports)
+            target['max'] = max(target['max'], stats['max'])
+            target['time_waiting'] += stats['time_waiting']
+    merged['events_per_second'] = merged['steps'] / merged['wall_time'] if merged['wall_time'] else 0.0
+    return merged
@@ -1,14 +1,109 @@
 import simpy
+from bisect import insort
+from itertools import count
+from types import SimpleNamespace
+from modules.topology import Topology
+from modules.trace import TraceWriter
+from modules.observer import Observer
+from modules.scheduler import Scheduler
+
+class Reservation(simpy.Event):
+    def __init__(self, routes: 'Routes', operation: tuple, slots: frozenset, priority: int, order: int) -> None:
+        super().__init__(routes.env)
+        self.routes = routes
+        self.operation = operation
+        self.slots = slots
+        self.priority = priority
+        self.request_time = routes.env.now
+        self.wait_time = None
+        self.key = (priority, routes.env.now, order)
+
+    def __lt__(self, other: 'Reservation') -> bool:
+        return self.key < other.key
+
+    def __enter__(self) -> 'Reservation':
+        return self
+
+    def __exit__(self, *exc):
+        self.routes.release(self)
+
 
 class Routes:
-    def __init__(self, env: simpy.Environment) -> None:
+    def __init__(self, env: simpy.Environment, topology: Topology, trace: TraceWriter = None, observer: Observer = None, scheduler: Scheduler = None) -> None:
         self.env = env
+        self.trace = trace
+        self.scheduler = scheduler
         self.name = 'Routes'
-        self.rLB_P = simpy.Resource(env, capacity=1)
-        self.rP_T = simpy.Resource(env, capacity=1)
-        self.rT_AB1 = simpy.Resource(env, capacity=1)
-        self.rT_AB2 = simpy.Resource(env, capacity=1)
-        self.rAB1_K1 = simpy.Resource(env, capacity=1)
-        self.rAB2_K2 = simpy.Resource(env, capacity=1)
-        self.rK1_VK = simpy.Resource(env, capacity=1)
-        self.rK2_VK = simpy.Resource(env, capacity=1)
+        self.topology = topology
+
+        # Belegbare Plätze: erst alle Routenabschnitte, danach je Einheit ein Platz
+        offset = len(topology.segments)
+        self.unit_index = {unit: offset + i for i, unit in enumerate(topology.units)}
+        self.slot_names = list(topology.segments) + list(topology.units)
+        self.busy: set[int] = set()
+        self.queue: list[Reservation] = []
+        self.wait_times: dict[tuple, list[float]] = {}
+        self._sets: dict[tuple, frozenset] = {}
+        self._order = count()
+
+        # Belegung je Routenabschnitt (0/1) für den Observer, Schlüssel 'Routes/occupancy.<Abschnitt>'
+        self.occupancy = SimpleNamespace(**dict.fromkeys(topology.segments, 0))
+        if observer is not None:
+            for segment in topology.segments:
+                observer.add_variable(f'occupancy', self, f'occupancy.{segment}')
+
+    def slots(self, unit: str, operation: str, *units: str) -> frozenset:
+        key = (unit, operation, *units)
+        if key not in self._sets:
+            self._sets[key] = frozenset(self.topology.locks.get((unit, operation), ())) | {self.unit_index[name] for name in units}
+        return self._sets[key]
+
+    def reserve(self, unit: str, operation: str, *units: str, priority: int = 0) -> Reservation:
+        # Alle Abschnitte und Einheiten werden gemeinsam oder gar nicht vergeben,
+        # ein Prozess hält daher nie einen Teil und wartet auf den Rest
+        reservation = Reservation(self, (unit, operation), self.slots(unit, operation, *units), priority, next(self._order))
+        insort(self.queue, reservation)
+        self._trace('request', reservation)
+        self._dispatch()
+        return reservation
+
+    def release(self, reservation: Reservation):
+        if reservation.triggered:
+            self.busy -= reservation.slots
+            self._occupy(reservation, 0)
+            self._trace('release', reservation)
+        else:
+            self.queue.remove(reservation)
+            self._trace('cancel', reservation)
+        self._dispatch()
+
+    def _dispatch(self):
+        # In Reihenfolge (Priorität, Ankunft) vergeben. Plätze, auf die eine frühere Anfrage noch wartet,
+        # sind für spätere Anfragen gesperrt, damit große Anfragen nicht verhungern.
+        claimed = set()
+        waiting = []
+        for reservation in self.queue:
+            if self.busy.isdisjoint(reservation.slots) and claimed.isdisjoint(reservation.slots):
+                self.busy |= reservation.slots
+                self._occupy(reservation, 1)
+                reservation.wait_time = self.env.now - reservation.request_time
+                self.wait_times.setdefault(reservation.operation, []).append(reservation.wait_time)
+                self._trace('grant', reservation)
+                reservation.succeed()
+            else:
+                claimed |= reservation.slots
+                waiting.append(reservation)
+        self.queue = waiting
+
+    def _occupy(self, reservation: Reservation, value: int):
+        for slot in reservation.slots:
+            if slot < len(self.topology.segments):
+                setattr(self.occupancy, self.slot_names[slot], value)
+        if self.scheduler is not None:
+            self.scheduler.notify()
+
+    def _trace(self, event: str, reservation: Reservation):
+        if self.trace is not None:
+            unit, operation = reservation.operation
+            slots = [self.slot_names[i] for i in sorted(reservation.slots)]
+            self.trace.route(self.env.now, event, unit, operation, reservation.priority, reservation.wait_time, slots)
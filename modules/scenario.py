@@ -0,0 +1,132 @@
+from modules.tools import convertTime
+from modules.wfi_manager import WFIManager
+from modules.container import UNIT_TYPES
+from modules.observer import Observer
+from modules.routes import Routes
+from modules.scheduler import Scheduler
+from modules.storage import MemoryStore, ChunkedStore
+from modules.streams import RandomStreams
+from modules.topology import Topology, load_topology
+from modules.trace import TraceWriter
+from modules.profiling import Profiler
+
+import simpy
+from collections import namedtuple
+
+
+SIM_TIME = convertTime((20, 0, 0))
+
+Run = namedtuple('Run', ['env', 'observer', 'wfi', 'system', 'stack', 'makespan', 'end'])
+
+
+def build(env, observer, routes, scheduler, sT=SIM_TIME, wfi_capacity=40, streams=None):
+    topology = routes.topology
+    wfi = WFIManager(env, sT, wfi_capacity, observer, scheduler)
+    system = {
+        name: UNIT_TYPES[spec['type']](env, sT, name, wfi, observer, routes, scheduler, streams)
+        for name, spec in topology.units.items()
+    }
+    for name, spec in topology.units.items():
+        # Optionale Prioritäten je Operation für die Routenvergabe, kleinere Werte zuerst
+        system[name].priorities.update(spec.get('priorities', {}))
+
+    stack = []
+    for (unit, operation, *args), offset in zip(topology.stack, topology.offsets):
+        process = getattr(system[unit], operation)(*(system[arg] for arg in args))
+        stack.append(env.process(delayed(env, offset, process) if offset else process))
+
+    return wfi, system, stack
+
+def delayed(env, delay, process):
+    yield env.timeout(delay)
+    return (yield env.process(process))
+
+def wheel(env, observer, scheduler):
+    while True:
+        observer.cycle(int(env.now))
+        yield scheduler.changed()
+
+# Abbruchkriterien: Fabrik (env, system, stack, topology) -> Event, der Lauf endet beim ersten ausgelösten
+GOALS = {
+    'stack': lambda env, system, stack, topology: env.all_of(stack),
+    'production': lambda env, system, stack, topology: env.all_of([process for process, (_, operation, *_) in zip(stack, topology.stack) if operation.startswith('prod')]),
+    'cht': lambda env, system, stack, topology: env.any_of([unit.cht_violated for unit in system.values()]),
+}
+
+def goal_event(goal, env, system, stack, topology) -> simpy.Event:
+    # goal: Name aus GOALS, Zahl (Makespan Schranke in Sekunden), eigene Fabrik oder Liste davon (was zuerst eintritt)
+    if isinstance(goal, (list, tuple)):
+        return env.any_of([goal_event(g, env, system, stack, topology) for g in goal])
+    if isinstance(goal, (int, float)):
+        return env.timeout(max(0, goal - env.now))
+    if callable(goal):
+        return goal(env, system, stack, topology)
+    if goal not in GOALS:
+        raise ValueError(f'Unbekanntes Abbruchkriterium {goal!r}, erlaubt: {list(GOALS)}')
+    return GOALS[goal](env, system, stack, topology)
+
+def apply_overrides(system: dict, units: dict):
+    # units = {'AB1': {'cht': ..., 'fill_rates': {'UV042': 14}}, '*': {...}}, '*' gilt für alle Einheiten, die das
+    # Attribut (bzw. alle Schlüssel eines dict) haben. Unbekannte Namen sind ein Fehler, sonst liefe still die Standardanlage.
+    for pattern in sorted(units, key=lambda pattern: pattern != '*'):
+        if pattern != '*' and pattern not in system:
+            raise ValueError(f"Override für unbekannte Einheit '{pattern}'")
+        targets = list(system.values()) if pattern == '*' else [system[pattern]]
+        for attribute, value in units[pattern].items():
+            applied = False
+            for unit in targets:
+                if not hasattr(unit, attribute):
+                    continue
+                current = getattr(unit, attribute)
+                if isinstance(value, dict):
+                    unknown = set(value) - set(current)
+                    if unknown and pattern == '*':
+                        continue
+                    if unknown:
+                        raise ValueError(f"{unit.name}.{attribute} hat keine Schlüssel {sorted(unknown)}, vorhanden: {sorted(current)}")
+                    setattr(unit, attribute, {**current, **value})
+                else:
+                    setattr(unit, attribute, value)
+                applied = True
+            if not applied:
+                raise ValueError(f"Override '{attribute}' passt zu keiner Einheit für '{pattern}'")
+
+def duration_table(sT=SIM_TIME, units: dict = None, topology: str | dict = None) -> dict:
+    env = simpy.Environment()
+    routes = Routes(env=env, topology=Topology(load_topology(topology)))
+    _, system, _ = build(env, Observer(sT=sT), routes, Scheduler(env=env), sT)
+    apply_overrides(system, units or {})
+    table = {}
+    for unit in system.values():
+        table[(unit.name, 'cip')] = unit.cip_durations
+        table[(unit.name, 'sip')] = unit.sip_durations
+    return table
+
+def simulate(sT=SIM_TIME, wfi_capacity=40, store: MemoryStore | ChunkedStore = None, seed: int = None, distribution: str = 'truncnorm', predrawn: dict = None, units: dict = None, topology: str | dict = None, trace: TraceWriter = None, profiler: Profiler = None, goal=None) -> Run:
+    env = profiler.environment() if profiler is not None else simpy.Environment()
+    observer = Observer(sT=sT, store=store, trace=trace)
+    scheduler = Scheduler(env=env)
+    routes = Routes(env=env, topology=Topology(load_topology(topology)), trace=trace, observer=observer, scheduler=scheduler)
+    streams = RandomStreams(seed, distribution)
+
+    wfi, system, stack = build(env, observer, routes, scheduler, sT, wfi_capacity, streams)
+    apply_overrides(system, units or {})
+    if profiler is not None:
+        profiler.attach(routes, wfi)
+    if predrawn:
+        for (name, phase), values in predrawn.items():
+            system[name].samplers[phase].preload(values)
+    finished = []
+    env.all_of(stack).callbacks.append(lambda event: finished.append(env.now))
+
+    env.process(wheel(env, observer, scheduler))
+    if goal is None:
+        env.run(until=sT)
+    else:
+        # Spätestens bei sT, sonst sobald das Abbruchkriterium erfüllt ist
+        env.run(until=env.any_of([goal_event(goal, env, system, stack, routes.topology), env.timeout(sT)]))
+    end = min(env.now, sT)
+    observer.close(end)
+
+    makespan = finished[0] if finished else None
+    return Run(env, observer, wfi, system, stack, makespan, end)
@@ -0,0 +1,179 @@
+import os
+import sys
+import json
+import math
+import random
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from modules.scenario import SIM_TIME, simulate
+from modules.topology import load_topology
+from modules.accumulators import SummaryStore
+from modules.montecarlo import replication_seeds
+from modules import log
+
+OBJECTIVES = ('makespan', 'wfi_peak')
+
+
+def candidate_topology(base: dict, order: tuple[int, ...], offsets: tuple[int, ...]) -> dict:
+    # order: Indizes in den ursprünglichen Stack, offsets: Startverzögerung in Sekunden je Position
+    stack = base['stack']
+    return dict(base, stack=[stack[i] for i in order], offsets=list(offsets))
+
+def keeps_precedence(stack: list, order: tuple[int, ...]) -> bool:
+    # Je Einheit müssen die Einträge in der ursprünglichen Reihenfolge bleiben (cip -> sip -> prod),
+    # sonst wartet z. B. sip mit gehaltener Route auf eine Reinigung, die nie kommt
+    last: dict[str, int] = {}
+    for i in order:
+        unit = stack[i][0]
+        if last.get(unit, -1) > i:
+            return False
+        last[unit] = i
+    return True
+
+def evaluate(order: tuple, offsets: tuple, base: dict, seeds: list[int], sT: int, wfi_capacity: int, distribution: str, objective: str, cutoff: float) -> dict:
+    # Mittelwert der Zielgröße über die Seeds. Nicht fertige Läufe zählen mit sT.
+    # Abbruch, sobald der Mittelwert cutoff sicher erreicht: die Zielgrößen sind nicht negativ, also ist
+    # die Summe der bisherigen Läufe / Anzahl Seeds eine untere Schranke. Bei der Makespan wird zusätzlich
+    # der Horizont des nächsten Laufs auf das verbleibende Budget gekürzt.
+    topology = candidate_topology(base, order, offsets)
+    total, values = 0.0, []
+    for seed in seeds:
+        horizon = sT
+        if objective == 'makespan' and math.isfinite(cutoff):
+            horizon = min(sT, int(cutoff * len(seeds) - total) + 1)
+        store = SummaryStore()
+        with log.configured(level=log.OFF):
+            run = simulate(sT=horizon, wfi_capacity=wfi_capacity, store=store, seed=seed, distribution=distribution, topology=topology, goal='stack')
+        if objective == 'makespan':
+            value = run.makespan if run.makespan is not None else sT
+        else:
+            value = store.summaries[f'{run.wfi.name}/reserved_capacity']['max'] or 0.0
+            # Unfertige Pläne sind unabhängig vom WFI Bedarf keine Lösung
+            value = value if run.makespan is not None else math.inf
+        values.append(value)
+        total += value
+        if total / len(seeds) >= cutoff:
+            return dict(order=list(order), offsets=list(offsets), value=math.inf, cutoff=True, replications=len(values))
+    return dict(order=list(order), offsets=list(offsets), value=total / len(seeds), cutoff=False, replications=len(values), values=values)
+
+
+class ScheduleOptimizer:
+    # Lokale Suche über Startreihenfolge und Startverzögerungen des Stacks. Je Iteration werden
+    # neighbours Nachbarn (Tausch, Verschieben, Verzögerung ändern) parallel bewertet, der beste
+    # wird übernommen, wenn er besser ist. Alle Kandidaten nutzen dieselben Seeds (CRN), bereits
+    # bewertete Kandidaten kommen aus dem Cache.
+    def __init__(self, topology: str | dict = None, objective: str = 'makespan', replications: int = 4, seed: int = 0, workers: int = None,
+                 sT: int = SIM_TIME, wfi_capacity: int = 40, distribution: str = 'truncnorm', offset_step: int = 900, max_offset: int = 4 * 3600) -> None:
+        if objective not in OBJECTIVES:
+            raise ValueError(f'Unbekannte Zielgröße {objective!r}, erlaubt: {OBJECTIVES}')
+        self.base = load_topology(topology)
+        self.objective = objective
+        self.seeds = replication_seeds(replications, seed)
+        self.random = random.Random(seed)
+        self.workers = workers or os.cpu_count()
+        self.sT = sT
+        self.wfi_capacity = wfi_capacity
+        self.distribution = distribution
+        self.offset_step = offset_step
+        self.max_offset = max_offset
+        self.cache: dict[tuple, dict] = {}
+        self.evaluations = 0
+        self.cutoffs = 0
+
+    def neighbour(self, order: tuple, offsets: tuple, attempts: int = 20) -> tuple[tuple, tuple]:
+        # Kandidaten, die die Reihenfolge innerhalb einer Einheit verletzen, werden verworfen
+        for _ in range(attempts):
+            candidate = self._move(order, offsets)
+            if keeps_precedence(self.base['stack'], candidate[0]):
+                return candidate
+        return order, offsets
+
+    def _move(self, order: tuple, offsets: tuple) -> tuple[tuple, tuple]:
+        order, offsets = list(order), list(offsets)
+        i, j = self.random.sample(range(len(order)), 2)
+        move = self.random.choice(('swap', 'shift', 'offset'))
+        if move == 'swap':
+            order[i], order[j] = order[j], order[i]
+            offsets[i], offsets[j] = offsets[j], offsets[i]
+        elif move == 'shift':
+            order.insert(j, order.pop(i))
+            offsets.insert(j, offsets.pop(i))
+        else:
+            offsets[i] = min(self.max_offset, max(0, offsets[i] + self.random.choice((-1, 1)) * self.offset_step))
+        return tuple(order), tuple(offsets)
+
+    def _evaluate(self, pool: ProcessPoolExecutor, candidates: list[tuple], cutoff: float) -> list[dict]:
+        futures = {candidate: pool.submit(evaluate, *candidate, self.base, self.seeds, self.sT, self.wfi_capacity, self.distribution, self.objective, cutoff)
+                   for candidate in dict.fromkeys(candidates) if candidate not in self.cache}
+        for candidate, future in futures.items():
+            result = future.result()
+            self.evaluations += 1
+            self.cutoffs += result['cutoff']
+            # Auch abgebrochene Kandidaten bleiben gültig, die Schranke best wird nur kleiner
+            self.cache[candidate] = result
+        return [self.cache[candidate] for candidate in candidates]
+
+    def optimize(self, iterations: int = 20, neighbours: int = None, patience: int = 5) -> dict:
+        neighbours = neighbours or self.workers
+        current = (tuple(range(len(self.base['stack']))), tuple(self.base.get('offsets', [0] * len(self.base['stack']))))
+        history = []
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            best = self._evaluate(pool, [current], math.inf)[0]
+            initial = best['value']
+            stale = 0
+            for iteration in range(iterations):
+                candidates = list(dict.fromkeys(self.neighbour(*current) for _ in range(neighbours)))
+                results = self._evaluate(pool, candidates, best['value'])
+                candidate, result = min(zip(candidates, results), key=lambda pair: pair[1]['value'])
+                if result['value'] < best['value']:
+                    current, best, stale = candidate, result, 0
+                else:
+                    stale += 1
+                history.append(best['value'])
+                if stale >= patience:
+                    break
+
+        stack = self.base['stack']
+        return dict(
+            objective=self.objective,
+            initial=initial,
+            value=best['value'],
+            stack=[stack[i] for i in best['order']],
+            offsets=best['offsets'],
+            topology=candidate_topology(self.base, tuple(best['order']), tuple(best['offsets'])),
+            evaluations=self.evaluations,
+            cutoffs=self.cutoffs,
+            history=history,
+        )
+
+
+def main(argv: list[str] = None):
+    parser = argparse.ArgumentParser(description='Startreihenfolge und Startverzögerungen des Stacks optimieren')
+    parser.add_argument('--objective', choices=OBJECTIVES, default='makespan')
+    parser.add_argument('--iterations', type=int, default=20)
+    parser.add_argument('--neighbours', type=int, default=None, help='Kandidaten je Iteration, Standard: Anzahl Worker')
+    parser.add_argument('--patience', type=int, default=5, help='Abbruch nach so vielen Iterationen ohne Verbesserung')
+    parser.add_argument('--replications', type=int, default=4)
+    parser.add_argument('--offset-step', type=int, default=900, help='Schrittweite der Startverzögerung in Sekunden')
+    parser.add_argument('--max-offset', type=int, default=4 * 3600)
+    parser.add_argument('--hours', type=float, default=SIM_TIME / 3600)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--wfi-capacity', type=int, default=40)
+    parser.add_argument('--topology', default=None)
+    parser.add_argument('--output', default=None, help='Beste Anlagenbeschreibung als JSON hierhin schreiben')
+    args = parser.parse_args(argv)
+
+    optimizer = ScheduleOptimizer(args.topology, args.objective, args.replications, args.seed, args.workers, int(args.hours * 3600),
+                                  args.wfi_capacity, offset_step=args.offset_step, max_offset=args.max_offset)
+    result = optimizer.optimize(args.iterations, args.neighbours, args.patience)
+    if args.output is not None:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result['topology'], f, indent=2, ensure_ascii=False)
+    result.pop('topology')
+    print(json.dumps(result, indent=2))
+    if not math.isfinite(result['value']):
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+import simpy
+from typing import Callable
+
+
+class Timer:
+    def __init__(self, callback: Callable, args: tuple) -> None:
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    def _fire(self, event: simpy.Event):
+        if not self.cancelled:
+            self.callback(*self.args)
+
+
+class Scheduler:
+    def __init__(self, env: simpy.Environment) -> None:
+        self.env = env
+        self.name = 'Scheduler'
+        self._changed = env.event()
+
+    def call_later(self, delay: int | float, callback: Callable, *args) -> Timer:
+        timer = Timer(callback, args)
+        self.env.timeout(delay).callbacks.append(timer._fire)
+        return timer
+
+    def call_at(self, time: int | float, callback: Callable, *args) -> Timer:
+        return self.call_later(max(0, time - self.env.now), callback, *args)
+
+    def notify(self):
+        # Mehrere Änderungen im selben Zeitschritt lösen nur einen Durchlauf aus
+        if not self._changed.triggered:
+            self._changed.succeed()
+
+    def changed(self) -> simpy.Event:
+        if self._changed.processed:
+            self._changed = self.env.event()
+        return self._changed
@@ -1,5 +1,10 @@
 from enum import Enum
-from modules.tools import debug, convertTime
+from modules.tools import convertTime
+from modules.log import get_logger
+from modules.scheduler import Scheduler
+from modules.trace import TraceWriter
+
+import simpy
 
 class HYG_STAT(Enum):
     dirty = 1
@@ -9,27 +14,60 @@ class HYG_STAT(Enum):
     sanitized = 5
     production = 6
 
-def change_state(container, new_state, type):
-    time_required = convertTime((0, 20))
+TRANSITION_TIME = convertTime((0, 20))
 
-    allowed_transitions = {
-        HYG_STAT.dirty: [HYG_STAT.cleaning, HYG_STAT.sanitizing],
-        HYG_STAT.cleaning: [HYG_STAT.dirty, HYG_STAT.cleaned],
-        HYG_STAT.cleaned: [HYG_STAT.dirty, HYG_STAT.cleaning, HYG_STAT.sanitizing],
-        HYG_STAT.sanitizing: [HYG_STAT.dirty, HYG_STAT.sanitized],
-        HYG_STAT.sanitized: [HYG_STAT.dirty, HYG_STAT.cleaning, HYG_STAT.sanitizing, HYG_STAT.production],
-        HYG_STAT.production: [HYG_STAT.dirty],
-    }
+ALLOWED_TRANSITIONS = {
+    HYG_STAT.dirty: (HYG_STAT.cleaning, HYG_STAT.sanitizing),
+    HYG_STAT.cleaning: (HYG_STAT.dirty, HYG_STAT.cleaned),
+    HYG_STAT.cleaned: (HYG_STAT.dirty, HYG_STAT.cleaning, HYG_STAT.sanitizing, HYG_STAT.production),
+    HYG_STAT.sanitizing: (HYG_STAT.dirty, HYG_STAT.sanitized),
+    HYG_STAT.sanitized: (HYG_STAT.dirty, HYG_STAT.cleaning, HYG_STAT.sanitizing, HYG_STAT.production),
+    HYG_STAT.production: (HYG_STAT.dirty,),
+}
 
-    if type == 'cip':
-        if new_state in allowed_transitions.get(container.state, []):
-            yield container.env.timeout(time_required)
-            container.state = new_state
-            debug(container.env, f'Status C Change', f'{container.name} - {container.state}')
-    elif type == 'sip':
-        if new_state in allowed_transitions.get(container.sip_state, []):
-            yield container.env.timeout(time_required)
-            container.sip_state = new_state
-            debug(container.env, f'Status S Change', f'{container.name} - {container.sip_state}')
+SIP_STATES = (HYG_STAT.sanitizing, HYG_STAT.sanitized)
+
+
+class StateMachine:
+    def __init__(self, env: simpy.Environment, scheduler: Scheduler, name: str, type: str, state: HYG_STAT = HYG_STAT.dirty, trace: TraceWriter = None) -> None:
+        self.env = env
+        self.scheduler = scheduler
+        self.name = name
+        self.type = type
+        self.state = state
+        self.trace = trace
+        self.label = 'Status C Change' if type == 'cip' else 'Status S Change'
+        self.log = get_logger(self.label)
+        self._waiters: dict[HYG_STAT, list[simpy.Event]] = {}
+
+    def set(self, new_state: HYG_STAT):
+        if self.trace is not None:
+            self.trace.transition(self.env.now, self.name, self.type, self.state, new_state)
+        self.state = new_state
+        self.scheduler.notify()
 
+        waiters = self._waiters.pop(new_state, None)
+        if waiters:
+            for event in waiters:
+                event.succeed()
 
+    def wait_for(self, state: HYG_STAT) -> simpy.Event:
+        event = self.env.event()
+        if self.state == state:
+            event.succeed()
+        else:
+            self._waiters.setdefault(state, []).append(event)
+        return event
+
+    def change(self, new_state: HYG_STAT):
+        if new_state in ALLOWED_TRANSITIONS[self.state]:
+            yield self.env.timeout(TRANSITION_TIME)
+            self.set(new_state)
+            self.log.debug(self.env, '%s - %s', self.name, self.state)
+
+
+def change_state(container, new_state, type):
+    if type == 'cip':
+        yield from container.cip_machine.change(new_state)
+    elif type == 'sip':
+        yield from container.sip_machine.change(new_state)
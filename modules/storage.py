@@ -0,0 +1,189 @@
+import os
+import json
+import numpy as np
+from array import array
+
+def evaluate(times: np.ndarray, values: np.ndarray, rates: np.ndarray, t: np.ndarray) -> np.ndarray:
+    # Ab times[i] gilt values[i] + rates[i] * (t - times[i]), vor dem ersten Eintrag 0
+    t = np.asarray(t, dtype=float)
+    if len(times) == 0:
+        return np.zeros(t.shape)
+
+    idx = np.searchsorted(times, t, side='right') - 1
+    before = idx < 0
+    idx[before] = 0
+    result = values[idx] + rates[idx] * (t - times[idx])
+    result[before] = 0.0
+    return result
+
+
+class MemoryBuffer:
+    def __init__(self) -> None:
+        self.times = array('d')
+        self.values = array('d')
+        self.rates = array('d')
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def append(self, time: float, value: float, rate: float):
+        self.times.append(time)
+        self.values.append(value)
+        self.rates.append(rate)
+
+    def last(self) -> tuple | None:
+        if not self.times:
+            return None
+        return self.times[-1], self.values[-1], self.rates[-1]
+
+    def replace_last(self, time: float, value: float, rate: float):
+        self.times[-1] = time
+        self.values[-1] = value
+        self.rates[-1] = rate
+
+    def arrays(self, t0: float = None, t1: float = None) -> tuple:
+        return np.array(self.times), np.array(self.values), np.array(self.rates)
+
+    def close(self) -> dict:
+        return {}
+
+
+class ChunkBuffer:
+    def __init__(self, directory: str, chunk_size: int, chunks: list = None) -> None:
+        self.directory = directory
+        self.chunk_size = chunk_size
+        # Abgeschlossene Chunks: {'file', 'count', 't0', 't1'}
+        self.chunks: list[dict] = chunks if chunks is not None else []
+        self._chunk = None
+        self._count = 0
+        self._length = sum(c['count'] for c in self.chunks)
+        # Letzter Datensatz im Speicher, damit record nach einem geschriebenen Chunk nicht von der Platte liest
+        self._last: tuple | None = None
+
+    def __len__(self) -> int:
+        return self._length
+
+    def _open_chunk(self):
+        os.makedirs(self.directory, exist_ok=True)
+        name = f'chunk_{len(self.chunks):05d}.npy'
+        self._file = name
+        self._chunk = np.lib.format.open_memmap(os.path.join(self.directory, name), mode='w+', dtype=np.float64, shape=(self.chunk_size, 3))
+        self._count = 0
+
+    def _close_chunk(self):
+        if self._chunk is None:
+            return
+        if self._count:
+            self._chunk.flush()
+            self.chunks.append(dict(file=self._file, count=self._count, t0=float(self._chunk[0, 0]), t1=float(self._chunk[self._count - 1, 0])))
+        self._chunk = None
+        self._count = 0
+
+    def append(self, time: float, value: float, rate: float):
+        if self._chunk is None:
+            self._open_chunk()
+        self._chunk[self._count] = (time, value, rate)
+        self._last = (time, value, rate)
+        self._count += 1
+        self._length += 1
+        if self._count == self.chunk_size:
+            self._close_chunk()
+
+    def last(self) -> tuple | None:
+        if self._last is None and self.chunks:
+            # Nur bei einem wieder geöffneten Puffer, einmalig
+            chunk = self.chunks[-1]
+            self._last = tuple(float(v) for v in self._load(chunk)[chunk['count'] - 1])
+        return self._last
+
+    def replace_last(self, time: float, value: float, rate: float):
+        self._last = (time, value, rate)
+        if self._chunk is not None and self._count:
+            self._chunk[self._count - 1] = (time, value, rate)
+        else:
+            chunk = self.chunks[-1]
+            data = np.load(os.path.join(self.directory, chunk['file']), mmap_mode='r+')
+            data[chunk['count'] - 1] = (time, value, rate)
+            data.flush()
+            chunk['t1'] = float(time)
+
+    def _load(self, chunk: dict) -> np.ndarray:
+        return np.load(os.path.join(self.directory, chunk['file']), mmap_mode='r')
+
+    def arrays(self, t0: float = None, t1: float = None) -> tuple:
+        # Nur Chunks laden, die das Fenster [t0, t1] betreffen, inklusive des
+        # Segments, das vor t0 beginnt und noch in das Fenster hineinreicht
+        selected = self.chunks
+        if t0 is not None:
+            first = max(0, np.searchsorted([c['t0'] for c in self.chunks], t0, side='right') - 1)
+            selected = selected[first:]
+        if t1 is not None:
+            selected = [c for c in selected if c['t0'] <= t1]
+
+        parts = [self._load(c)[:c['count']] for c in selected]
+        if self._chunk is not None and self._count and (t1 is None or self._chunk[0, 0] <= t1):
+            parts.append(self._chunk[:self._count])
+
+        if not parts:
+            return np.zeros(0), np.zeros(0), np.zeros(0)
+        data = np.concatenate(parts)
+        return data[:, 0], data[:, 1], data[:, 2]
+
+    def close(self) -> dict:
+        self._close_chunk()
+        return dict(directory=os.path.basename(self.directory), chunks=self.chunks)
+
+
+class MemoryStore:
+    def buffer(self, key: str) -> MemoryBuffer:
+        return MemoryBuffer()
+
+    def close(self, **meta):
+        pass
+
+
+class ChunkedStore:
+    def __init__(self, path: str, chunk_size: int = 65536) -> None:
+        self.path = path
+        self.chunk_size = chunk_size
+        self.buffers: dict[str, ChunkBuffer] = {}
+        os.makedirs(path, exist_ok=True)
+
+    def buffer(self, key: str) -> ChunkBuffer:
+        directory = os.path.join(self.path, f's{len(self.buffers):04d}')
+        self.buffers[key] = ChunkBuffer(directory, self.chunk_size)
+        return self.buffers[key]
+
+    def close(self, **meta):
+        index = dict(meta, chunk_size=self.chunk_size, series={key: buffer.close() for key, buffer in self.buffers.items()})
+        with open(os.path.join(self.path, 'index.json'), 'w') as f:
+            json.dump(index, f, indent=1)
+
+    @staticmethod
+    def open(path: str) -> 'StoredRun':
+        return StoredRun(path)
+
+
+class StoredRun:
+    def __init__(self, path: str) -> None:
+        with open(os.path.join(path, 'index.json')) as f:
+            self.index = json.load(f)
+        self.path = path
+        self.sT = self.index.get('sT')
+
+    def keys(self) -> list[str]:
+        return list(self.index['series'])
+
+    def buffer(self, key: str) -> ChunkBuffer:
+        meta = self.index['series'][key]
+        return ChunkBuffer(os.path.join(self.path, meta['directory']), self.index['chunk_size'], meta['chunks'])
+
+    def at(self, key: str, t: np.ndarray) -> np.ndarray:
+        t = np.asarray(t, dtype=float)
+        if t.size == 0:
+            return np.zeros(0)
+        times, values, rates = self.buffer(key).arrays(t.min(), t.max())
+        return evaluate(times, values, rates, t)
+
+    def window(self, key: str, t0: int, t1: int) -> np.ndarray:
+        return self.at(key, np.arange(t0, t1, dtype=float))
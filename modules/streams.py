@@ -0,0 +1,21 @@
+import zlib
+import numpy as np
+
+
+class RandomStreams:
+    def __init__(self, seed: int = None, distribution: str = 'truncnorm') -> None:
+        self.seed_sequence = np.random.SeedSequence(seed)
+        self.seed = self.seed_sequence.entropy
+        self.distribution = distribution
+        self.streams: dict[tuple, np.random.Generator] = {}
+
+    def _sequence(self, key: tuple) -> np.random.SeedSequence:
+        # Der Schlüssel bestimmt den Strom, nicht die Reihenfolge der Anfragen.
+        # Gleicher Seed und gleicher Schlüssel ergeben in jedem Szenario dieselben Zahlen.
+        spawn_key = tuple(zlib.crc32(str(k).encode()) for k in key)
+        return np.random.SeedSequence(self.seed, spawn_key=spawn_key)
+
+    def stream(self, *key) -> np.random.Generator:
+        if key not in self.streams:
+            self.streams[key] = np.random.default_rng(self._sequence(key))
+        return self.streams[key]
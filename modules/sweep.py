@@ -0,0 +1,109 @@
+import os
+import json
+import copy
+import hashlib
+import functools
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+from modules.scenario import SIM_TIME
+from modules.montecarlo import replicate, replication_seeds, aggregate
+from modules.topology import load_topology
+
+# Bei Änderungen am Ergebnisformat erhöhen, damit alte Ergebnisse nicht mehr getroffen werden.
+# Änderungen am Simulationskern fließen zusätzlich über source_hash() in den Schlüssel ein.
+CACHE_VERSION = 3
+MODULES_DIR = os.path.dirname(os.path.abspath(__file__))
+
+DEFAULT_CONFIG = {
+    'sT': SIM_TIME,
+    'wfi_capacity': 40,
+    'distribution': 'truncnorm',
+    'units': {},
+    'topology': None,
+}
+
+
+def set_path(config: dict, path: str, value):
+    # 'units.AB1.fill_rates.UV042' -> config['units']['AB1']['fill_rates']['UV042']
+    keys = path.split('.')
+    node = config
+    for key in keys[:-1]:
+        node = node.setdefault(key, {})
+    node[keys[-1]] = value
+
+def expand_grid(grid: dict[str, list], base: dict = None) -> list[dict]:
+    base = base if base is not None else DEFAULT_CONFIG
+    points = []
+    for values in itertools.product(*grid.values()):
+        config = copy.deepcopy(base)
+        for path, value in zip(grid, values):
+            set_path(config, path, value)
+        points.append(config)
+    return points
+
+@functools.cache
+def source_hash(directory: str = MODULES_DIR) -> str:
+    # Inhalt aller Quellen unter modules/, jede Änderung am Kern ergibt neue Schlüssel
+    digest = hashlib.sha256()
+    for name in sorted(os.listdir(directory)):
+        if name.endswith('.py'):
+            with open(os.path.join(directory, name), 'rb') as f:
+                digest.update(name.encode() + b'\0' + f.read() + b'\0')
+    return digest.hexdigest()
+
+def config_key(config: dict, seed: int) -> str:
+    # Anlagentopologie mit Inhalt hashen, nicht nur mit Dateipfad
+    config = dict(config, topology=load_topology(config.get('topology')))
+    payload = json.dumps(dict(version=CACHE_VERSION, source=source_hash(), config=config, seed=seed), sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class ResultCache:
+    def __init__(self, path: str) -> None:
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+    def _file(self, key: str) -> str:
+        return os.path.join(self.path, key[:2], f'{key}.json')
+
+    def get(self, key: str) -> dict | None:
+        try:
+            with open(self._file(key)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def put(self, key: str, result: dict):
+        file = self._file(key)
+        os.makedirs(os.path.dirname(file), exist_ok=True)
+        # Erst vollständig schreiben, dann umbenennen, damit abgebrochene Läufe keine halben Einträge hinterlassen
+        tmp = f'{file}.{os.getpid()}.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(result, f)
+        os.replace(tmp, file)
+
+
+def sweep(grid: dict[str, list], replications: int = 10, seed: int = 0, workers: int = None, cache_dir: str = '.sweep_cache', base: dict = None) -> list[dict]:
+    cache = ResultCache(cache_dir)
+    points = expand_grid(grid, base)
+    seeds = replication_seeds(replications, seed)
+
+    results = {}
+    jobs = {}
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        for i, config in enumerate(points):
+            for rep_seed in seeds:
+                key = config_key(config, rep_seed)
+                if key in results or key in jobs:
+                    continue
+                cached = cache.get(key)
+                if cached is not None:
+                    results[key] = cached
+                else:
+                    jobs[key] = pool.submit(replicate, rep_seed, None, **config)
+
+        for key, job in jobs.items():
+            results[key] = job.result()
+            cache.put(key, results[key])
+
+    return [dict(config=config, simulated=sum(config_key(config, s) in jobs for s in seeds), summary=aggregate([results[config_key(config, s)] for s in seeds])) for config in points]
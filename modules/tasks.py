@@ -0,0 +1,92 @@
+import math
+import numpy as np
+from array import array
+from collections import namedtuple
+
+Task = namedtuple('Task', ['unit', 'task', 'start', 'end'])
+
+
+class TaskStore:
+    def __init__(self) -> None:
+        # Intervalle [start, end) in ganzen Sekunden, Einheit und Aufgabe als Index in units/names
+        self.units: list[str] = []
+        self.names: list[str] = []
+        self._unit_ids: dict[str, int] = {}
+        self._name_ids: dict[str, int] = {}
+        self._unit = array('i')
+        self._name = array('i')
+        self._start = array('q')
+        self._end = array('q')
+        self._index = None
+
+    def __len__(self) -> int:
+        return len(self._start)
+
+    def __iter__(self):
+        unit, name, start, end = self.arrays()
+        for i in range(len(start)):
+            yield Task(self.units[unit[i]], self.names[name[i]], int(start[i]), int(end[i]))
+
+    def _id(self, ids: dict, names: list, name: str) -> int:
+        id = ids.get(name)
+        if id is None:
+            id = ids[name] = len(names)
+            names.append(name)
+        return id
+
+    def add(self, unit: str, task: str, start: int, end: int):
+        self._unit.append(self._id(self._unit_ids, self.units, unit))
+        self._name.append(self._id(self._name_ids, self.names, task))
+        self._start.append(int(start))
+        self._end.append(int(end))
+        self._index = None
+
+    def arrays(self) -> tuple:
+        return np.array(self._unit, dtype=np.int32), np.array(self._name, dtype=np.int32), np.array(self._start, dtype=np.int64), np.array(self._end, dtype=np.int64)
+
+    def index(self) -> tuple:
+        # Nach Start sortiert, dazu das laufende Maximum der Enden. Alle Intervalle vor der ersten Stelle,
+        # an der dieses Maximum t überschreitet, sind bei t bereits beendet.
+        if self._index is None:
+            unit, name, start, end = self.arrays()
+            order = np.argsort(start, kind='stable')
+            end = end[order]
+            self._index = (unit[order], name[order], start[order], end, np.maximum.accumulate(end) if len(end) else end)
+        return self._index
+
+    def _select(self, t0: float, t1: float, unit: str = None, task: str = None) -> np.ndarray:
+        units, names, start, end, reach = self.index()
+        lo = np.searchsorted(reach, t0, side='right')
+        hi = np.searchsorted(start, t1, side='left')
+        idx = lo + np.flatnonzero(end[lo:hi] > t0)
+        if unit is not None:
+            idx = idx[units[idx] == self._unit_ids.get(unit, -1)]
+        if task is not None:
+            idx = idx[names[idx] == self._name_ids.get(task, -1)]
+        return idx
+
+    def overlapping(self, t0: float, t1: float, unit: str = None, task: str = None) -> list[Task]:
+        # Alle Intervalle mit start < t1 und end > t0
+        units, names, start, end, _ = self.index()
+        return [Task(self.units[units[i]], self.names[names[i]], int(start[i]), int(end[i])) for i in self._select(t0, t1, unit, task)]
+
+    def running(self, t: float, unit: str = None, task: str = None) -> list[Task]:
+        # start <= t < end, Intervallgrenzen sind ganze Sekunden
+        return self.overlapping(t, math.floor(t) + 1, unit, task)
+
+    def overlap(self, t0: float, t1: float, unit: str = None, task: str = None) -> int:
+        # Summe der Sekunden innerhalb [t0, t1), z.B. CIP auf AB1 während einer WFI Spitze
+        _, _, start, end, _ = self.index()
+        idx = self._select(t0, t1, unit, task)
+        return int(np.sum(np.minimum(end[idx], t1) - np.maximum(start[idx], t0)))
+
+    def frame(self):
+        # Gantt Tabelle in einem Schritt, Zeiten als Datum ab 1970-01-01 (auch über 24 h hinaus korrekt)
+        import pandas as pd
+        unit, name, start, end = self.arrays()
+        return pd.DataFrame(dict(
+            Task=np.array(self.units, dtype=object)[unit] if len(unit) else np.array([], dtype=object),
+            Start=pd.to_datetime(start, unit='s'),
+            Finish=pd.to_datetime(end, unit='s'),
+            Resource=np.array(self.names, dtype=object)[name] if len(name) else np.array([], dtype=object),
+        ))
@@ -1,11 +1,3 @@
-import simpy
-import random
-
-def debug(env: simpy.Environment, function: str, msg: str):
-    time = convertTime(env.now)
-    time = f'{time[0]}:{time[1]:02d}:{time[2]:02d}'
-    print(f'{time: ^20}{function: <25}{msg}')
-
 def convertTime(value: int | float | tuple) -> int | tuple | bool:
     match value:
         case (_, _, _):
@@ -37,10 +29,3 @@ def aufteilen(integer: int, gewichtungen: list[int]):
     anteile[-1] += integer - sum(anteile)
 
     return anteile
-
-def generate_random_time(durations):
-    standardabweichung = durations['mean'] / 5
-    zufallszahl = random.gauss(durations['mean'], standardabweichung)
-    while zufallszahl < durations['lower'] or zufallszahl > durations['upper']:
-        zufallszahl = random.gauss(durations['mean'], standardabweichung)
-    return round(zufallszahl)
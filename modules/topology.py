@@ -0,0 +1,97 @@
+import os
+import copy
+import json
+
+DEFAULT_PLANT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config', 'plant.json')
+
+
+class TopologyError(Exception):
+    pass
+
+
+def load_topology(source: str | dict = None) -> dict:
+    if source is None:
+        source = DEFAULT_PLANT
+    if isinstance(source, dict):
+        return source
+    with open(source, encoding='utf-8') as f:
+        return json.load(f)
+
+def generate_lines(lines: int, base: str | dict = None) -> dict:
+    # Referenzanlage mit n Abfülllinien (AB + Keimfilter je Linie) hinter Transferstrecke und vor dem Ventilknoten
+    config = copy.deepcopy(load_topology(base))
+    ab, keim = config['units']['AB1'], config['units']['Keim1']
+    segments = {'LB_P': config['segments']['LB_P'], 'P_T': config['segments']['P_T']}
+    units = {name: spec for name, spec in config['units'].items() if spec['type'] not in ('AB', 'Keimfilter')}
+
+    for i in range(1, lines + 1):
+        segments[f'T_AB{i}'] = ['Transfer', f'AB{i}']
+        segments[f'AB{i}_K{i}'] = [f'AB{i}', f'Keim{i}']
+        segments[f'K{i}_VK'] = [f'Keim{i}', 'VK']
+        line = [f'T_AB{i}', f'AB{i}_K{i}']
+        units[f'AB{i}'] = dict(ab, label=f'Abfüllbehälter_{i}', locks={'cip': line, 'sip': line, 'prod': ['LB_P', 'P_T', f'T_AB{i}']})
+        units[f'Keim{i}'] = dict(keim, label=f'Keimfilter_{i}', locks={'cip': line[1:] + [f'K{i}_VK'], 'sip': line[1:] + [f'K{i}_VK']})
+
+    transfer = ['P_T'] + [f'T_AB{i}' for i in range(1, lines + 1)]
+    knoten = [f'K{i}_VK' for i in range(1, lines + 1)]
+    units['Transfer'] = dict(units['Transfer'], locks={'cip': transfer, 'sip': transfer})
+    units['VK'] = dict(units['VK'], locks={'cip': knoten, 'sip': knoten})
+
+    # Eine Charge aus dem Lösebehälter geht an Linie 1, alle weiteren Linien werden gereinigt und sterilisiert
+    stack = list(config['stack'])
+    for i in range(2, lines + 1):
+        stack += [[f'AB{i}', 'cip'], [f'AB{i}', 'sip'], [f'Keim{i}', 'cip'], [f'Keim{i}', 'sip']]
+
+    return dict(config, segments=segments, units=units, stack=stack)
+
+def repeat_campaigns(campaigns: int, base: str | dict = None, period: int = 86400) -> dict:
+    # Eine Kampagne je period auf einer eigenen Kopie der Anlage (Einheiten und Abschnitte mit Suffix @i),
+    # Kampagne i startet um i * period. Dieselben Einheiten erneut zu nutzen geht nicht, nach der Produktion
+    # bleibt der Abfüllbehälter in production. Alle Kopien teilen sich den WFI Manager.
+    config = copy.deepcopy(load_topology(base))
+    offsets = config.get('offsets', [0] * len(config['stack']))
+    segments, units, stack, starts = {}, {}, [], []
+    for i in range(campaigns):
+        suffix = f'@{i}' if i else ''
+        segments.update({f'{segment}{suffix}': [f'{unit}{suffix}' for unit in ends] for segment, ends in config['segments'].items()})
+        for unit, spec in config['units'].items():
+            locks = {operation: [f'{segment}{suffix}' for segment in locked] for operation, locked in spec.get('locks', {}).items()}
+            units[f'{unit}{suffix}'] = dict(spec, locks=locks)
+        stack += [[f'{unit}{suffix}', operation, *(f'{arg}{suffix}' for arg in args)] for unit, operation, *args in config['stack']]
+        starts += [offset + i * period for offset in offsets]
+    return dict(config, segments=segments, units=units, stack=stack, offsets=starts)
+
+
+class Topology:
+    def __init__(self, config: dict) -> None:
+        self.config = config
+        self.units: dict[str, dict] = config['units']
+        self.segments: list[str] = list(config['segments'])
+        self.index: dict[str, int] = {name: i for i, name in enumerate(self.segments)}
+
+        for name, ends in config['segments'].items():
+            for unit in ends:
+                if unit not in self.units:
+                    raise TopologyError(f"Abschnitt '{name}' verweist auf unbekannte Einheit '{unit}'")
+
+        # (Einheit, Operation) -> Indizes der zu sperrenden Abschnitte
+        self.locks: dict[tuple[str, str], tuple[int, ...]] = {}
+        for unit, spec in self.units.items():
+            for operation, segments in spec.get('locks', {}).items():
+                for segment in segments:
+                    if segment not in self.index:
+                        raise TopologyError(f"Einheit '{unit}' sperrt unbekannten Abschnitt '{segment}' für '{operation}'")
+                self.locks[(unit, operation)] = tuple(self.index[segment] for segment in segments)
+
+        self.stack: list[tuple] = []
+        for entry in config['stack']:
+            unit, operation, *args = entry
+            for name in (unit, *args):
+                if name not in self.units:
+                    raise TopologyError(f"Stack Eintrag {entry} verweist auf unbekannte Einheit '{name}'")
+            self.stack.append((unit, operation, *args))
+
+        # Optionale Startverzögerung je Stack Eintrag in Sekunden, gleiche Reihenfolge wie stack
+        self.offsets: list[float] = list(config.get('offsets', [0] * len(self.stack)))
+        if len(self.offsets) != len(self.stack):
+            raise TopologyError(f'{len(self.offsets)} Startverzögerungen für {len(self.stack)} Stack Einträge')
@@ -0,0 +1,91 @@
+import os
+
+# pyarrow erst beim ersten TraceWriter laden, der Simulationskern bleibt ohne pyarrow importierbar
+pa = pq = None
+
+
+class TraceError(Exception):
+    pass
+
+
+def _load_arrow():
+    global pa, pq
+    if pa is None:
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise TraceError("Trace Export benötigt 'pyarrow'") from None
+        pa, pq = pyarrow, pyarrow.parquet
+
+def schemas() -> dict:
+    return {
+        'transitions': pa.schema([('run', pa.int64()), ('time', pa.float64()), ('unit', pa.string()), ('machine', pa.string()),
+                                  ('source', pa.string()), ('target', pa.string())]),
+        'wfi': pa.schema([('run', pa.int64()), ('time', pa.float64()), ('event', pa.string()), ('amount', pa.float64()),
+                          ('priority', pa.int64()), ('wait', pa.float64()), ('reserved', pa.float64()), ('available', pa.float64())]),
+        'routes': pa.schema([('run', pa.int64()), ('time', pa.float64()), ('event', pa.string()), ('unit', pa.string()),
+                             ('operation', pa.string()), ('priority', pa.int64()), ('wait', pa.float64()), ('slots', pa.list_(pa.string()))]),
+        'tasks': pa.schema([('run', pa.int64()), ('unit', pa.string()), ('task', pa.string()), ('start', pa.float64()), ('end', pa.float64())]),
+    }
+
+
+class TraceTable:
+    def __init__(self, file: str, schema, batch_size: int, format: str) -> None:
+        self.schema = schema
+        self.batch_size = batch_size
+        self.columns: list[list] = [[] for _ in schema.names]
+        self.rows = 0
+        if format == 'parquet':
+            self.writer = pq.ParquetWriter(file, schema)
+        else:
+            self.writer = pa.ipc.new_file(file, schema)
+
+    def append(self, *row):
+        for column, value in zip(self.columns, row):
+            column.append(value)
+        self.rows += 1
+        if self.rows >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.rows:
+            return
+        # Als Record Batch wegschreiben und Spalten leeren, der Speicher bleibt so unabhängig von der Laufzeit
+        self.writer.write_batch(pa.record_batch(self.columns, schema=self.schema))
+        self.columns = [[] for _ in self.schema.names]
+        self.rows = 0
+
+    def close(self):
+        self.flush()
+        self.writer.close()
+
+
+class TraceWriter:
+    # Ablage: <path>/<tabelle>/<run>.parquet, damit z.B. duckdb/polars '<path>/transitions/*.parquet' über alle Läufe lesen
+    def __init__(self, path: str, run: int = 0, batch_size: int = 65536, format: str = 'parquet') -> None:
+        _load_arrow()
+        if format not in ('parquet', 'arrow'):
+            raise TraceError(f"Unbekanntes Format '{format}'")
+        self.path = path
+        self.run = run
+        self.tables: dict[str, TraceTable] = {}
+        for name, schema in schemas().items():
+            os.makedirs(os.path.join(path, name), exist_ok=True)
+            self.tables[name] = TraceTable(os.path.join(path, name, f'{run}.{format}'), schema, batch_size, format)
+
+    def transition(self, time: float, unit: str, machine: str, source, target):
+        self.tables['transitions'].append(self.run, time, unit, machine, source.name, target.name)
+
+    def wfi(self, time: float, event: str, amount: float, priority: int, wait: float, reserved: float, available: float):
+        self.tables['wfi'].append(self.run, time, event, amount, priority, wait, reserved, available)
+
+    def route(self, time: float, event: str, unit: str, operation: str, priority: int, wait: float, slots: list[str]):
+        self.tables['routes'].append(self.run, time, event, unit, operation, priority, wait, slots)
+
+    def task(self, unit: str, task: str, start: float, end: float):
+        self.tables['tasks'].append(self.run, unit, task, start, end)
+
+    def close(self):
+        for table in self.tables.values():
+            table.close()
@@ -1,35 +1,85 @@
 import simpy
 import numpy as np
+from bisect import insort
+from itertools import count
 from modules.observer import Observer
+from modules.scheduler import Scheduler
+
+class WFIRequest(simpy.Event):
+    def __init__(self, env: simpy.Environment, amount: int, priority: int, reserve: bool, order: int) -> None:
+        super().__init__(env)
+        self.amount = amount
+        self.priority = priority
+        self.reserve = reserve
+        self.request_time = env.now
+        self.wait_time = None
+        self.key = (priority, env.now, order)
+
+    def __lt__(self, other: 'WFIRequest') -> bool:
+        return self.key < other.key
+
+class WFIError(ValueError):
+    pass
+
 
 class WFIManager:
-    def __init__(self, env: simpy.Environment, sT: int, total_capacity: int, observer: Observer) -> None:
+    def __init__(self, env: simpy.Environment, sT: int, total_capacity: int, observer: Observer, scheduler: Scheduler, strict_order: bool = False) -> None:
         self.env = env
         self.sT = sT
         self.name = 'WFI-Manager'
+        self.scheduler = scheduler
         self.total_capacity = total_capacity
         self.available_capacity = total_capacity
         self.reserved_capacity = 0
-        self.container_queue = []
+        self.strict_order = strict_order
+        self.trace = observer.trace
+        self.container_queue: list[WFIRequest] = []
+        self.wait_times: list[float] = []
+        self._order = count()
         observer.add_variable(f'capacity', self, 'available_capacity')
         observer.add_variable(f'reserved', self, 'reserved_capacity')
 
-    def cycle(self):
-        current_time = int(self.env.now)
-        if current_time < self.sT:
-            pass
-
-    def request_wfi(self, amount):
-        # TODO: Implementiere ein priority Flag der WFI reserviert obwohl nicht genügend 
-        # verfügbar ist. available = max(0, available - amount)
-        # Wichtig für das CEW verhalten.
-        if amount <= self.available_capacity:
-            self.available_capacity -= amount
-            self.reserved_capacity += amount
-            return True
+    def request_wfi(self, amount: int, priority: int = 0, reserve: bool = False) -> WFIRequest:
+        # Kleinere priority wird zuerst bedient, bei Gleichstand gilt FIFO.
+        # reserve=True reserviert auch ohne ausreichende Kapazität (CEW Verhalten),
+        # available_capacity fällt dabei nicht unter 0.
+        if amount > self.total_capacity and not reserve:
+            # Würde nie bedient und bliebe still in der Warteschlange
+            raise WFIError(f'WFI Anforderung {amount} übersteigt die Gesamtkapazität {self.total_capacity}')
+        request = WFIRequest(self.env, amount, priority, reserve, next(self._order))
+        if self.trace is not None:
+            self.trace.wfi(self.env.now, 'request', amount, priority, None, self.reserved_capacity, self.available_capacity)
+        if reserve:
+            self._grant(request)
         else:
-            return False
-        
-    def release_wfi(self, amount):
-        self.available_capacity += amount
+            insort(self.container_queue, request)
+            self._dispatch()
+        return request
+
+    def release_wfi(self, amount: int):
         self.reserved_capacity -= amount
+        self.available_capacity = max(0, self.total_capacity - self.reserved_capacity)
+        if self.trace is not None:
+            self.trace.wfi(self.env.now, 'release', amount, None, None, self.reserved_capacity, self.available_capacity)
+        self.scheduler.notify()
+        self._dispatch()
+
+    def _grant(self, request: WFIRequest):
+        self.reserved_capacity += request.amount
+        self.available_capacity = max(0, self.total_capacity - self.reserved_capacity)
+        request.wait_time = self.env.now - request.request_time
+        self.wait_times.append(request.wait_time)
+        if self.trace is not None:
+            self.trace.wfi(self.env.now, 'grant', request.amount, request.priority, request.wait_time, self.reserved_capacity, self.available_capacity)
+        self.scheduler.notify()
+        request.succeed()
+
+    def _dispatch(self):
+        # Weckt genau die wartenden Anfragen, die in die freie Kapazität passen
+        waiting = []
+        for request in self.container_queue:
+            if request.amount <= self.available_capacity and not (self.strict_order and waiting):
+                self._grant(request)
+            else:
+                waiting.append(request)
+        self.container_queue = waiting